@@ -0,0 +1,156 @@
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django_filters.utils import translate_validation
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from foodgram.db_connections import database_sync_to_async
+from recipes.models import Ingredient
+from . import catalogue
+from .filters import IngredientFilter, RecipeFilter
+from .querysets import requested_recipes
+from .renderers import FastJSONRenderer
+from .serializers import RecipeSerializer, requested_fields
+from .views import IngredientViewSet, RecipeViewSet
+
+recipe_list_view = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+recipe_detail_view = RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+})
+ingredient_list_view = IngredientViewSet.as_view({'get': 'list'})
+
+
+def json_response(data, status=200, headers=None):
+    response = HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type=FastJSONRenderer.media_type,
+    )
+    for header, value in (headers or {}).items():
+        response[header] = value
+    return response
+
+
+async def authenticate(request):
+    authenticator = TokenAuthentication()
+    user_auth = await database_sync_to_async(
+        authenticator.authenticate
+    )(request)
+    if user_auth is None:
+        return AnonymousUser()
+    return user_auth[0]
+
+
+def async_read_view(fallback):
+    """
+    Serve GET natively in the event loop, every other method is
+    delegated to the regular DRF ``fallback`` view.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                # Through the pool too, for its persistent connections.
+                return await database_sync_to_async(fallback)(
+                    request, *args, **kwargs
+                )
+            try:
+                request.user = await authenticate(request)
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return json_response(
+                    {'detail': NotFound.default_detail},
+                    status=NotFound.status_code
+                )
+            except APIException as exc:
+                headers = {}
+                if exc.status_code == 401:
+                    headers['WWW-Authenticate'] = 'Token'
+                detail = exc.detail
+                if not isinstance(detail, (list, dict)):
+                    detail = {'detail': detail}
+                return json_response(detail, exc.status_code, headers)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def serializer_context(request):
+    context = {'request': request}
+    # Only the embedded authors need the subscriptions.
+    fields = requested_fields(request.GET, RecipeSerializer.Meta.fields)
+    if request.user.is_authenticated and 'author' in fields:
+        author_ids = request.user.subscriptions.values_list(
+            'author_id', flat=True
+        )
+        context['subscribed_author_ids'] = await database_sync_to_async(
+            set
+        )(author_ids)
+    return context
+
+
+@async_read_view(recipe_list_view)
+async def recipe_list(request):
+    filterset = RecipeFilter(
+        request.GET,
+        queryset=requested_recipes(request),
+        request=request
+    )
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+
+    drf_request = Request(request)
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    recipes = await database_sync_to_async(
+        paginator.paginate_queryset
+    )(filterset.qs, drf_request)
+    serializer = RecipeSerializer(
+        recipes,
+        many=True,
+        context=await serializer_context(request)
+    )
+    return json_response(
+        paginator.get_paginated_response(serializer.data).data
+    )
+
+
+@async_read_view(recipe_detail_view)
+async def recipe_detail(request, pk):
+    recipe = await database_sync_to_async(get_object_or_404)(
+        requested_recipes(request), pk=pk
+    )
+    serializer = RecipeSerializer(
+        recipe,
+        context=await serializer_context(request)
+    )
+    return json_response(serializer.data)
+
+
+@async_read_view(ingredient_list_view)
+async def ingredient_list(request):
+    if catalogue.is_full_catalogue_request(request.GET):
+        full = await database_sync_to_async(catalogue.get_catalogue)()
+        return full.response(request)
+    filterset = IngredientFilter(
+        request.GET,
+        queryset=Ingredient.objects.all()
+    )
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+
+    ingredients = SearchFilter().filter_queryset(
+        Request(request), filterset.qs, IngredientViewSet
+    )
+    return json_response(await database_sync_to_async(list)(
+        ingredients.values('id', 'name', 'measurement_unit')
+    ))
@@ -0,0 +1,75 @@
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from foodgram.compression import brotli, preferred_encoding
+from recipes.ingredient_catalogue import get_catalogue_version
+from recipes.models import Ingredient
+from .renderers import FastJSONRenderer
+
+
+class Catalogue:
+    """Unfiltered ingredient list as ready JSON, gzip and brotli bytes."""
+
+    def __init__(self, version):
+        self.version = version
+        body = FastJSONRenderer().render(list(
+            Ingredient.objects.values('id', 'name', 'measurement_unit')
+        ))
+        digest = hashlib.sha1(body).hexdigest()
+        self.bodies = {None: body, 'gzip': gzip.compress(body, 9)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body)
+        self.etags = {
+            encoding: f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+            for encoding in self.bodies
+        }
+
+    def response(self, request):
+        encoding = preferred_encoding(request)
+        if_none_match = parse_etags(
+            request.META.get('HTTP_IF_NONE_MATCH', '')
+        )
+        if set(if_none_match) & set(self.etags.values()):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                self.bodies[encoding],
+                content_type=FastJSONRenderer.media_type,
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = self.etags[encoding]
+        patch_vary_headers(response, ('Accept-Encoding',))
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.INGREDIENT_CATALOGUE_MAX_AGE
+        )
+        return response
+
+
+_catalogue = None
+_lock = threading.Lock()
+
+
+def get_catalogue():
+    """The catalogue of the current version, built once per process."""
+    global _catalogue
+    version = get_catalogue_version()
+    catalogue = _catalogue
+    if catalogue is None or catalogue.version != version:
+        with _lock:
+            if _catalogue is None or _catalogue.version != version:
+                _catalogue = Catalogue(version)
+            catalogue = _catalogue
+    return catalogue
+
+
+def is_full_catalogue_request(query_params):
+    return not any(query_params.get(param) for param in ('name', 'search'))
@@ -0,0 +1,61 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Запрос с этим Idempotency-Key ещё выполняется.'
+    default_code = 'idempotency_key_in_progress'
+
+
+def idempotent(method):
+    """
+    Replay the stored successful response for a repeated Idempotency-Key,
+    so retries of a write are served without touching the database.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+
+        cache_key = 'idempotency:{}:{}'.format(
+            request.user.id, hashlib.sha1(key.encode()).hexdigest()
+        )
+        stored = cache.get(cache_key)
+        if stored is None:
+            if not cache.add(
+                cache_key + ':lock', True, settings.IDEMPOTENCY_LOCK_TIMEOUT
+            ):
+                raise RequestInProgress
+            try:
+                response = method(self, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    stored = (
+                        request.method, request.path,
+                        response.status_code, response.data,
+                    )
+                    cache.set(
+                        cache_key, stored, settings.IDEMPOTENCY_KEY_TIMEOUT
+                    )
+                return response
+            finally:
+                cache.delete(cache_key + ':lock')
+
+        stored_method, stored_path, status_code, data = stored
+        if (stored_method, stored_path) != (request.method, request.path):
+            raise ValidationError({'Idempotency-Key': [
+                'Ключ уже использован для другого запроса.'
+            ]})
+        response = Response(data, status=status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+    return wrapper
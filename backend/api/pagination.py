@@ -0,0 +1,47 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from rest_framework.pagination import LimitOffsetPagination
+
+from recipes.pagination import estimated_count
+
+EXACT = 'exact'
+ESTIMATED = 'estimated'
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination that avoids ``COUNT(*)`` full scans on
+    PostgreSQL: unfiltered listings report the planner estimate and
+    filtered counts are cached for a short time. ``PAGINATION_COUNT``
+    set to ``'exact'`` restores the plain behaviour.
+    """
+
+    def get_count(self, queryset):
+        if (
+            settings.PAGINATION_COUNT != ESTIMATED
+            or not isinstance(queryset, QuerySet)
+            or connections[queryset.db].vendor != 'postgresql'
+        ):
+            return super().get_count(queryset)
+
+        estimate = estimated_count(queryset)
+        if estimate is not None:
+            return estimate
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'pagination_count:' + md5(
+            f'{queryset.db}:{sql}:{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().get_count(queryset)
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
@@ -0,0 +1,132 @@
+from django.db.models import Count, Exists, OuterRef, Prefetch
+
+from recipes.ingredient_index import index as ingredient_index
+from recipes.models import AmountIngredient, Cart, Favorite, Recipe, User
+from .serializers import (
+    BaseUserSerializer,
+    RecipeSerializer,
+    ShortRecipeSerializer,
+    UserWithAdditionalInfoSerializer,
+    requested_fields,
+)
+
+
+def serialized_fields(serializer_class, fields=None):
+    """Concrete model fields read by ``serializer_class``."""
+    concrete = {
+        field.name
+        for field in serializer_class.Meta.model._meta.concrete_fields
+    }
+    return [
+        name for name in fields or serializer_class.Meta.fields
+        if name in concrete
+    ]
+
+
+def short_recipes():
+    return Recipe.objects.only(*serialized_fields(ShortRecipeSerializer))
+
+
+def full_recipes(user, fields=RecipeSerializer.Meta.fields):
+    """
+    Recipes for ``RecipeSerializer``, joins, prefetches and annotations
+    of the fields not in ``fields`` are left out.
+    """
+    loaded = [
+        name for name in serialized_fields(RecipeSerializer)
+        if name in fields
+    ]
+    recipes = Recipe.objects.all()
+    if 'author' in fields:
+        recipes = recipes.select_related('author')
+        loaded += [
+            f'author__{name}'
+            for name in serialized_fields(BaseUserSerializer)
+        ]
+    recipes = recipes.only(*loaded)
+    if 'ingredients' in fields:
+        recipes = recipes.prefetch_related(Prefetch(
+            'ingredient_amounts',
+            queryset=AmountIngredient.objects.select_related('ingredient')
+        ))
+    if user.is_authenticated:
+        relations = {
+            'is_favorited': Favorite,
+            'is_in_shopping_cart': Cart,
+        }
+        recipes = recipes.annotate(**{
+            name: Exists(model.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+            for name, model in relations.items()
+            if name in fields
+        })
+    return recipes
+
+
+def requested_recipes(request):
+    """``full_recipes`` trimmed to the ``?fields=`` / ``?omit=`` selection."""
+    query_params = getattr(request, 'query_params', request.GET)
+    return full_recipes(request.user, requested_fields(
+        query_params, RecipeSerializer.Meta.fields
+    ))
+
+
+def requested_users(users, serializer_class, query_params):
+    return users.only(*serialized_fields(
+        serializer_class,
+        requested_fields(query_params, serializer_class.Meta.fields)
+    ))
+
+
+def subscribed_authors(user, query_params):
+    """
+    Authors followed by ``user`` for ``UserWithAdditionalInfoSerializer``,
+    the recipes of the whole page are counted and prefetched at once.
+    """
+    serializer_class = UserWithAdditionalInfoSerializer
+    fields = requested_fields(query_params, serializer_class.Meta.fields)
+    authors = requested_users(
+        User.objects.filter(authors__subscriber=user),
+        serializer_class,
+        query_params
+    )
+    if 'recipes_count' in fields:
+        authors = authors.annotate(
+            recipes_count=Count('recipes', distinct=True)
+        )
+    if 'recipes' in fields:
+        authors = authors.prefetch_related(Prefetch(
+            'recipes',
+            # The author is read to match the recipes with their authors.
+            queryset=Recipe.objects.only(
+                *serialized_fields(ShortRecipeSerializer), 'author'
+            )
+        ))
+    return authors
+
+
+class RecipesByIngredients:
+    """
+    Lazy sequence of recipes ranked by the ingredient index, sliced by the
+    paginator, so only the requested page is ranked and loaded.
+    """
+
+    def __init__(self, recipes, ingredient_ids):
+        self.recipes = recipes
+        self._count, self._top = ingredient_index.search(ingredient_ids)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, page):
+        ranked = self._top(page.stop)[page]
+        recipes = self.recipes.in_bulk([pk for pk, _, _ in ranked])
+        result = []
+        for pk, matched, missing in ranked:
+            if pk in recipes:
+                recipe = recipes[pk]
+                recipe.matched = matched
+                recipe.missing = missing
+                result.append(recipe)
+        return result
@@ -0,0 +1,34 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, falls back to stdlib json."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        # Datetimes go through the DRF encoder for the same format.
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=option,
+        )
+        # Keep the output a strict javascript subset, same as JSONRenderer.
+        return (
+            ret.replace('\u2028'.encode(), b'\\u2028')
+            .replace('\u2029'.encode(), b'\\u2029')
+        )
@@ -1,7 +1,13 @@
 # recipes/serializers.py
+from django.db import IntegrityError
+from django.db.models import Q
 from django.db.transaction import atomic
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.serializers import (
+    ListField,
+    ListSerializer,
     ModelSerializer,
+    Serializer,
     SerializerMethodField,
     ImageField,
     IntegerField,
@@ -9,17 +15,24 @@ from rest_framework.serializers import (
     PrimaryKeyRelatedField,
     ReadOnlyField,
 )
+from rest_framework.validators import UniqueValidator
 from recipes.models import (
     MIN_AMOUNT_INGREDIENTS,
     MIN_COOKING_TIME,
+    MIN_SERVINGS,
     Cart,
     Favorite,
     Ingredient,
     Recipe,
     AmountIngredient
 )
-from djoser.serializers import UserSerializer
+from djoser.serializers import (
+    UserCreateSerializer as DjoserUserCreateSerializer,
+    UserSerializer,
+)
 
+from recipes.bloom import user_identifiers
+from recipes.ingredient_index import index as ingredient_index
 from recipes.models import User
 import base64
 import binascii
@@ -28,6 +41,41 @@ from django.conf import settings
 from django.core.files.base import ContentFile
 
 
+def requested_fields(query_params, available):
+    """Names of ``available`` kept by ``?fields=`` and ``?omit=``."""
+    names = list(available)
+    if query_params.get('fields'):
+        wanted = set(query_params['fields'].split(','))
+        names = [name for name in names if name in wanted]
+    omitted = set(query_params.get('omit', '').split(','))
+    return [name for name in names if name not in omitted]
+
+
+class SparseFieldsetMixin:
+    """Drops the fields not selected by the query of a read request."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        # Nested serializers keep all their fields, only the root object
+        # or the items of a root list are filtered.
+        top_level = self is self.root or (
+            isinstance(self.parent, ListSerializer)
+            and self.parent is self.root
+        )
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not top_level
+        ):
+            return fields
+        query_params = getattr(request, 'query_params', request.GET)
+        return {
+            name: fields[name]
+            for name in requested_fields(query_params, fields)
+        }
+
+
 class Base64ImageField(ImageField):
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif'}
     DEFAULT_MAX_SIZE = settings.DEFAULT_CLIENT_MAX_FILESIZE
@@ -88,6 +136,35 @@ class ShortRecipeSerializer(ModelSerializer):
         read_only_fields = fields
 
 
+class RecipeIdsSerializer(Serializer):
+    recipes = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_MAX_SIZE,
+    )
+
+    def validate_recipes(self, recipes):
+        # Drop duplicates, keep the request order.
+        return list(dict.fromkeys(recipes))
+
+
+class CartServingsSerializer(Serializer):
+    servings = IntegerField(min_value=MIN_SERVINGS, default=MIN_SERVINGS)
+
+
+class RecipeByIngredientsSerializer(ShortRecipeSerializer):
+    matched_ingredients = IntegerField(source='matched', read_only=True)
+    missing_ingredients = IntegerField(source='missing', read_only=True)
+
+    class Meta(ShortRecipeSerializer.Meta):
+        fields = (
+            *ShortRecipeSerializer.Meta.fields,
+            "matched_ingredients",
+            "missing_ingredients",
+        )
+        read_only_fields = fields
+
+
 class IngredientSerializer(ModelSerializer):
 
     class Meta:
@@ -95,18 +172,24 @@ class IngredientSerializer(ModelSerializer):
         fields = ("id", "name", "measurement_unit")
 
 
-class BaseUserSerializer(UserSerializer):
+class BaseUserSerializer(SparseFieldsetMixin, UserSerializer):
     is_subscribed = SerializerMethodField()
     avatar = Base64ImageField(required=False)
 
     def get_is_subscribed(self, user):
         request = self.context.get('request')
-        return (
-            request is not None
-            and request.user.is_authenticated
-            and request.user != user
-            and user.authors.filter(subscriber=request.user).exists()
-        )
+        if (
+            request is None
+            or not request.user.is_authenticated
+            or request.user == user
+        ):
+            return False
+        # One query per response instead of one per serialized user.
+        if 'subscribed_author_ids' not in self.context:
+            self.context['subscribed_author_ids'] = set(
+                request.user.subscriptions.values_list('author_id', flat=True)
+            )
+        return user.id in self.context['subscribed_author_ids']
 
     class Meta(UserSerializer.Meta):
         model = User
@@ -118,9 +201,62 @@ class BaseUserSerializer(UserSerializer):
         read_only_fields = fields
 
 
+class UserCreateSerializer(DjoserUserCreateSerializer):
+    """
+    Username and email uniqueness is checked with one query, and only
+    when the Bloom filter may already contain one of the values.
+    """
+
+    UNIQUE_FIELDS = ('username', 'email')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.UNIQUE_FIELDS:
+            fields[name].validators = [
+                validator for validator in fields[name].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+    def check_unique(self, attrs, force=False):
+        values = {name: attrs[name] for name in self.UNIQUE_FIELDS}
+        if not force and not any(
+            map(user_identifiers.may_exist, values.values())
+        ):
+            return
+        query = Q()
+        for name, value in values.items():
+            query |= Q(**{name: value})
+        taken = User.objects.filter(query).values_list(*values)
+        errors = {}
+        for row in taken:
+            for name, value in zip(values, row):
+                if value == values[name]:
+                    field = User._meta.get_field(name)
+                    errors[name] = [field.error_messages['unique'] % {
+                        'model_name': User._meta.verbose_name,
+                        'field_label': field.verbose_name,
+                    }]
+        if errors:
+            raise ValidationError(errors)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        self.check_unique(attrs)
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return self.perform_create(validated_data)
+        except IntegrityError:
+            # Registered elsewhere after the filter was built.
+            self.check_unique(validated_data, force=True)
+            self.fail('cannot_create_user')
+
+
 class UserWithAdditionalInfoSerializer(BaseUserSerializer):
     recipes = SerializerMethodField()
-    recipes_count = IntegerField(source='recipes.count', read_only=True)
+    recipes_count = SerializerMethodField()
 
     class Meta(BaseUserSerializer.Meta):
         fields = [
@@ -130,8 +266,15 @@ class UserWithAdditionalInfoSerializer(BaseUserSerializer):
         ]
         read_only_fields = fields
 
+    def get_recipes_count(self, obj):
+        # Annotated by subscribed_authors, counted for a single author.
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return obj.recipes.count()
+
     def get_recipes(self, obj):
         request = self.context.get('request')
+        # Sliced from the prefetched recipes when there are any.
         recipes = obj.recipes.all()
 
         if request:
@@ -147,8 +290,38 @@ class UserWithAdditionalInfoSerializer(BaseUserSerializer):
         return serializer.data
 
 
+class PreloadedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """Looks ids up in ``preloaded`` first, unknown ones as usual."""
+
+    preloaded = None
+
+    def to_internal_value(self, data):
+        if self.preloaded is not None and not isinstance(data, bool):
+            try:
+                return self.preloaded[int(data)]
+            except (TypeError, ValueError, KeyError):
+                pass
+        return super().to_internal_value(data)
+
+
+class AmountIngredientListSerializer(ListSerializer):
+    def to_internal_value(self, data):
+        # One query for all the ingredients instead of one per item.
+        if isinstance(data, list):
+            ids = [
+                item['id'] for item in data
+                if isinstance(item, dict)
+                and isinstance(item.get('id'), (int, str))
+                and str(item['id']).isdigit()
+            ]
+            self.child.fields['id'].preloaded = Ingredient.objects.in_bulk(
+                ids
+            )
+        return super().to_internal_value(data)
+
+
 class AmountIngredientSerializer(ModelSerializer):
-    id = PrimaryKeyRelatedField(
+    id = PreloadedPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(),
         source='ingredient'
     )
@@ -161,9 +334,10 @@ class AmountIngredientSerializer(ModelSerializer):
     class Meta:
         model = AmountIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
+        list_serializer_class = AmountIngredientListSerializer
 
 
-class RecipeSerializer(ModelSerializer):
+class RecipeSerializer(SparseFieldsetMixin, ModelSerializer):
     author = BaseUserSerializer(read_only=True)
     ingredients = AmountIngredientSerializer(
         source='ingredient_amounts',
@@ -195,12 +369,14 @@ class RecipeSerializer(ModelSerializer):
         )
 
     def get_is_favorited(self, recipe):
-        return self._is_in_relations(recipe, Favorite)
+        return self._is_in_relations(recipe, Favorite, 'is_favorited')
 
     def get_is_in_shopping_cart(self, recipe):
-        return self._is_in_relations(recipe, Cart)
+        return self._is_in_relations(recipe, Cart, 'is_in_shopping_cart')
 
-    def _is_in_relations(self, recipe, model):
+    def _is_in_relations(self, recipe, model, annotation):
+        if hasattr(recipe, annotation):
+            return getattr(recipe, annotation)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return model.objects.filter(
@@ -249,3 +425,5 @@ class RecipeSerializer(ModelSerializer):
             )
             for item in ingredients_data
         ])
+        # bulk_create sends no signals.
+        ingredient_index.schedule_refresh(recipe.id)
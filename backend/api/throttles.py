@@ -0,0 +1,13 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import UserRateThrottle
+
+
+class RelationWriteThrottle(UserRateThrottle):
+    """Per-user limit for favorite, shopping cart and subscribe writes."""
+
+    scope = 'relation_writes'
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
@@ -1,7 +1,9 @@
 from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, RecipeViewSet, IngredientViewSet
+from .views import (
+    UserViewSet, RecipeViewSet, IngredientViewSet, db_pool_metrics
+)
 
 router = DefaultRouter()
 router.register(r'recipes', RecipeViewSet, basename='recipe')
@@ -12,8 +14,18 @@ router.register('users', UserViewSet, basename='users')
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/db-pool/', db_pool_metrics, name='db-pool-metrics'),
 ]
 
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+    # Served ahead of the router, write methods fall back to the viewsets.
+    urlpatterns = [
+        path('recipes/', async_views.recipe_list),
+        path('recipes/<int:pk>/', async_views.recipe_detail),
+        path('ingredients/', async_views.ingredient_list),
+    ] + urlpatterns
+
 if settings.DEBUG:
     from drf_spectacular.views import (
         SpectacularAPIView,
@@ -1,4 +1,19 @@
+import hashlib
+import os
 from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.shopping_list import get_shopping_list, shopping_list_key
+
+EXPORT_VERSION_KEY = 'shopping_list:export:{user_id}'
+
+
+def format_amount(amount) -> str:
+    return f'{amount:.3f}'.rstrip('0').rstrip('.')
 
 
 def generate_shopping_cart(ingredients, recipes) -> str:
@@ -8,17 +23,51 @@ def generate_shopping_cart(ingredients, recipes) -> str:
         '',
         'Продукты:',
         *[
-            f"{i}. {ing['ingredient__name'].capitalize()} "
-            f"({ing['ingredient__measurement_unit']}) — {ing['total_amount']}"
+            f"{i}. {ing['name'].capitalize()} "
+            f"({ing['unit']}) — {format_amount(ing['total_amount'])}"
             for i, ing in enumerate(ingredients, start=1)
         ],
         '',
         'Рецепты:',
         *[
-            f"• {recipe.recipe.name} — "
-            f"{recipe.recipe.author.username}"
+            f"• {recipe['recipe__name']} — "
+            f"{recipe['recipe__author__username']}"
+            + (
+                f" (порций: {recipe['servings']})"
+                if recipe['servings'] > 1 else ''
+            )
             for recipe in recipes
         ],
         '',
         'Приятного приготовления!'
     ])
+
+
+def export_shopping_cart(user):
+    """
+    Path of the user's shopping list file, rewritten when the shopping
+    list version or the day changes. The new file is moved over the old
+    one, so a download that already opened it keeps reading it.
+    """
+    directory = Path(settings.PROTECTED_MEDIA_ROOT, 'shopping_lists')
+    path = directory / f'{user.id}.txt'
+    version = (
+        f'{datetime.now():%Y%m%d}-'
+        + hashlib.sha1(shopping_list_key(user).encode()).hexdigest()
+    )
+    key = EXPORT_VERSION_KEY.format(user_id=user.id)
+    if cache.get(key) == version and path.exists():
+        return path
+
+    directory.mkdir(parents=True, exist_ok=True)
+    temporary = directory / f'{user.id}-{uuid4().hex}.tmp'
+    try:
+        temporary.write_text(
+            generate_shopping_cart(*get_shopping_list(user)),
+            encoding='utf-8'
+        )
+        os.replace(temporary, path)
+    finally:
+        temporary.unlink(missing_ok=True)
+    cache.set(key, version, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+    return path
@@ -1,57 +1,132 @@
-from django.db.models import Sum
-from django.http import FileResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.permissions import (
+    IsAdminUser,
     IsAuthenticatedOrReadOnly,
     IsAuthenticated
 )
 from rest_framework.response import Response
 
+from foodgram import db_connections
+from foodgram.file_delivery import deliver_file
+from . import catalogue
+from .idempotency import idempotent
 from .permissions import IsOwnerOrReadOnly
+from .throttles import RelationWriteThrottle
 from recipes.models import Recipe, Ingredient, Favorite, Cart, \
-    AmountIngredient, Subscription
+    Subscription
+from recipes import outbox, short_links
+from recipes.shopping_list import bump_cart_version
 from .serializers import (
+    CartServingsSerializer,
+    RecipeByIngredientsSerializer,
+    RecipeIdsSerializer,
     RecipeSerializer,
     ShortRecipeSerializer,
     IngredientSerializer,
     User
 )
 from .filters import IngredientFilter, RecipeFilter
-from .utils import generate_shopping_cart
+from .querysets import (
+    RecipesByIngredients,
+    full_recipes,
+    requested_recipes,
+    requested_users,
+    short_recipes,
+    subscribed_authors,
+)
+from .utils import export_shopping_cart
 from djoser.views import UserViewSet as DjoserUserViewSet
 from .serializers import UserWithAdditionalInfoSerializer, BaseUserSerializer
 
 
+def query_ids(request, max_count, name):
+    """Integer ids of the comma-separated ``?ids=`` parameter."""
+    ids = [pk.strip() for pk in request.query_params.get('ids', '').split(',')]
+    # Larger ids overflow the integer columns instead of matching nothing.
+    if not all(
+        pk.isascii() and pk.isdigit() and int(pk) <= short_links.MAX_PK
+        for pk in ids
+    ):
+        raise ValidationError({'ids': [f'Укажите id {name} через запятую.']})
+    if len(ids) > max_count:
+        raise ValidationError(
+            {'ids': [f'Можно указать не более {max_count} {name}.']}
+        )
+    return [int(pk) for pk in ids]
+
+
+def existing_recipe_pk(pk):
+    """Recipe pk of the URL, checked through the short-link cache."""
+    if (
+        not pk.isdigit()
+        or int(pk) > short_links.MAX_PK
+        or not short_links.resolver.exists(int(pk))
+    ):
+        raise NotFound(f"Рецепт с ID {pk} не найден.")
+    return int(pk)
+
+
 class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects \
-        .select_related('author') \
-        .prefetch_related('ingredients') \
-        .all()
+    queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    FULL_RECIPE_ACTIONS = (
+        'list', 'retrieve', 'create', 'update', 'partial_update'
+    )
+    SHORT_RECIPE_ACTIONS = (
+        'favorite', 'delete_favorite',
+        'shopping_cart', 'update_shopping_cart', 'delete_shopping_cart',
+        'similar', 'by_ingredients',
+    )
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'batch'):
             return RecipeSerializer
         return super().get_serializer_class()
 
+    def get_queryset(self):
+        if self.action in self.SHORT_RECIPE_ACTIONS:
+            return short_recipes()
+        if self.action in ('list', 'retrieve', 'batch'):
+            return requested_recipes(self.request)
+        if self.action in self.FULL_RECIPE_ACTIONS:
+            return full_recipes(self.request.user)
+        return super().get_queryset()
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        self._refetch_instance(serializer)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self._refetch_instance(serializer)
+
+    def _refetch_instance(self, serializer):
+        # Serialize the response from the prefetched queryset
+        # instead of lazily loading every ingredient row.
+        serializer.instance = self.get_queryset().get(
+            pk=serializer.instance.pk
+        )
 
     @action(
         detail=True,
         methods=['post'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[RelationWriteThrottle]
     )
+    @idempotent
     def favorite(self, request, pk=None):
-        recipe = get_object_or_404(Recipe, pk=pk)
+        recipe = get_object_or_404(self.get_queryset(), pk=pk)
         return self._add_to_relation(
             recipe=recipe,
             model=Favorite,
@@ -59,8 +134,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
     @favorite.mapping.delete
+    @idempotent
     def delete_favorite(self, request, pk=None):
-        recipe = get_object_or_404(Recipe, pk=pk)
+        recipe = get_object_or_404(self.get_queryset(), pk=pk)
         return self._remove_from_relation(
             user=request.user,
             recipe=recipe,
@@ -70,42 +146,173 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=True,
         methods=['post'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[RelationWriteThrottle]
     )
+    @idempotent
     def shopping_cart(self, request, pk=None):
-        recipe = get_object_or_404(Recipe, pk=pk)
+        recipe = get_object_or_404(self.get_queryset(), pk=pk)
+        serializer = CartServingsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         return self._add_to_relation(
             recipe=recipe,
             model=Cart,
-            request=request
+            request=request,
+            **serializer.validated_data
         )
 
+    @shopping_cart.mapping.patch
+    @idempotent
+    def update_shopping_cart(self, request, pk=None):
+        recipe = get_object_or_404(self.get_queryset(), pk=pk)
+        serializer = CartServingsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            updated = Cart.objects.filter(
+                user=request.user,
+                recipe=recipe
+            ).update(**serializer.validated_data)
+            if not updated:
+                raise ValidationError(
+                    f"Отношение с {Cart._meta.verbose_name} "
+                    f"с рецептом {recipe.name} не существует"
+                )
+            outbox.publish(outbox.topic(Cart, 'updated'), {
+                'user_id': request.user.id,
+                'recipe_id': recipe.id,
+                **serializer.validated_data,
+            })
+        bump_cart_version(request.user.id)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
     @shopping_cart.mapping.delete
+    @idempotent
     def delete_shopping_cart(self, request, pk=None):
-        recipe = get_object_or_404(Recipe, pk=pk)
+        recipe = get_object_or_404(self.get_queryset(), pk=pk)
         return self._remove_from_relation(
             user=request.user,
             recipe=recipe,
             model=Cart,
         )
 
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='favorite',
+        url_name='bulk-favorite',
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[RelationWriteThrottle]
+    )
+    @idempotent
+    def bulk_favorite(self, request):
+        return self._bulk_change_relation(request, Favorite)
+
+    @bulk_favorite.mapping.delete
+    @idempotent
+    def bulk_delete_favorite(self, request):
+        return self._bulk_change_relation(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='shopping_cart',
+        url_name='bulk-shopping-cart',
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[RelationWriteThrottle]
+    )
+    @idempotent
+    def bulk_shopping_cart(self, request):
+        return self._bulk_change_relation(request, Cart)
+
+    @bulk_shopping_cart.mapping.delete
+    @idempotent
+    def bulk_delete_shopping_cart(self, request):
+        return self._bulk_change_relation(request, Cart)
+
     @staticmethod
-    def _add_to_relation(recipe, model, request):
-        obj, created = model.objects.get_or_create(
+    @transaction.atomic
+    def _bulk_change_relation(request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['recipes']
+
+        related = dict(
+            Recipe.objects
+            .filter(pk__in=ids)
+            .annotate(related=Exists(model.objects.filter(
+                user=request.user,
+                recipe=OuterRef('pk')
+            )))
+            .values_list('pk', 'related')
+        )
+
+        if request.method == 'POST':
+            # One insert per recipe: its rowcount tells whether this request
+            # created the row or a concurrent one won, only ours get events.
+            created = {
+                pk for pk, is_related in related.items()
+                if not is_related and model.objects.create_if_absent(
+                    user=request.user, recipe_id=pk
+                )
+            }
+            outbox.publish_many(outbox.topic(model, 'created'), [
+                {'user_id': request.user.id, 'recipe_id': pk}
+                for pk in sorted(created)
+            ])
+            if model is Cart:
+                bump_cart_version(request.user.id)
+            statuses = {
+                pk: 'created' if pk in created else 'exists'
+                for pk in related
+            }
+        else:
+            model.objects.filter(
+                user=request.user,
+                recipe_id__in=[
+                    pk for pk, is_related in related.items() if is_related
+                ]
+            ).delete()
+            statuses = {
+                pk: 'deleted' if is_related else 'not_related'
+                for pk, is_related in related.items()
+            }
+
+        return Response(
+            [
+                {'id': pk, 'status': statuses.get(pk, 'not_found')}
+                for pk in ids
+            ],
+            status=status.HTTP_200_OK
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def _add_to_relation(recipe, model, request, **defaults):
+        created = model.objects.create_if_absent(
             user=request.user,
-            recipe=recipe
+            recipe=recipe,
+            **defaults
         )
         if not created:
             raise ValidationError(
                 f"Отношение с {model._meta.verbose_name} "
                 f"с рецептом {recipe.name} уже установлено"
             )
+        # create_if_absent sends no signals.
+        outbox.publish(outbox.topic(model, 'created'), {
+            'user_id': request.user.id,
+            'recipe_id': recipe.id,
+            **defaults,
+        })
+        if model is Cart:
+            bump_cart_version(request.user.id)
         return Response(
             ShortRecipeSerializer(recipe, context={'request': request}).data,
             status=status.HTTP_201_CREATED
         )
 
     @staticmethod
+    @transaction.atomic
     def _remove_from_relation(user, recipe, model):
         deleted, _ = model.objects.filter(user=user, recipe=recipe).delete()
         if not deleted:
@@ -121,40 +328,68 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        cart_items = user.carts
+        return deliver_file(
+            export_shopping_cart(request.user),
+            content_type='text/plain; charset=utf-8',
+            filename='shopping_cart.txt',
+            as_attachment=True,
+        )
 
-        ingredients = (
-            AmountIngredient.objects
-            .filter(recipe__in=cart_items.values_list('recipe', flat=True))
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
+    @action(detail=False, methods=['get'])
+    def by_ingredients(self, request):
+        ids = query_ids(
+            request, settings.INGREDIENT_SEARCH_MAX_IDS, 'ингредиентов'
+        )
+        page = self.paginate_queryset(
+            RecipesByIngredients(self.get_queryset(), ids)
+        )
+        return self.get_paginated_response(
+            RecipeByIngredientsSerializer(
+                page, many=True, context={'request': request}
+            ).data
         )
 
-        recipes = (
-            cart_items
-            .select_related('recipe__author')
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        # Drop duplicates, keep the request order.
+        ids = list(dict.fromkeys(
+            query_ids(request, settings.BULK_RECIPES_MAX_SIZE, 'рецептов')
+        ))
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True
+        )
+        return Response(
+            {
+                'results': serializer.data,
+                'missing': [pk for pk in ids if pk not in recipes],
+            },
+            status=status.HTTP_200_OK
         )
 
-        content = generate_shopping_cart(ingredients, recipes)
-        response = FileResponse(
-            content,
-            content_type='text/plain;',
-            as_attachment=True,
-            filename='shopping_cart.txt'
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        pk = existing_recipe_pk(pk)
+        recipes = (
+            self.get_queryset()
+            .filter(neighbor_of__recipe_id=pk)
+            .order_by('-neighbor_of__score')
+        )
+        return Response(
+            ShortRecipeSerializer(
+                recipes, many=True, context={'request': request}
+            ).data,
+            status=status.HTTP_200_OK
         )
-        return response
 
     @action(detail=True, methods=['get'], url_path="get-link")
     def get_link(self, request, pk=None):
-        if not Recipe.objects.filter(pk=pk).exists():
-            raise NotFound(f"Рецепт с ID {pk} не найден.")
+        pk = existing_recipe_pk(pk)
         return Response(
             {'short-link':
                 request.build_absolute_uri(reverse(
                     'recipe-short-link',
-                    args=[pk]))},
+                    args=[short_links.encode(pk)]))},
             status=status.HTTP_200_OK
         )
 
@@ -167,6 +402,14 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     search_fields = ("^name",)
 
+    def list(self, request, *args, **kwargs):
+        if (
+            request.accepted_renderer.format == 'json'
+            and catalogue.is_full_catalogue_request(request.query_params)
+        ):
+            return catalogue.get_catalogue().response(request)
+        return super().list(request, *args, **kwargs)
+
 
 class UserViewSet(DjoserUserViewSet):
 
@@ -175,19 +418,33 @@ class UserViewSet(DjoserUserViewSet):
             return [IsAuthenticated()]
         return super().get_permissions()
 
+    def get_queryset(self):
+        users = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return requested_users(
+                users, self.get_serializer_class(), self.request.query_params
+            )
+        return users
+
     @action(
         detail=False,
         methods=['get']
     )
     def subscriptions(self, request):
-        authors = User.objects.filter(authors__subscriber=request.user)
+        authors = subscribed_authors(request.user, request.query_params)
         page = self.paginate_queryset(authors)
         serializer = UserWithAdditionalInfoSerializer(
             page, many=True, context={'request': request}
         )
         return self.get_paginated_response(serializer.data)
 
-    @action(detail=True, methods=['post', 'delete'])
+    @action(
+        detail=True,
+        methods=['post', 'delete'],
+        throttle_classes=[RelationWriteThrottle]
+    )
+    @idempotent
+    @transaction.atomic
     def subscribe(self, request, id):
         if request.method == 'DELETE':
             get_object_or_404(
@@ -201,12 +458,16 @@ class UserViewSet(DjoserUserViewSet):
         author = get_object_or_404(User, pk=id)
         if request.user == author:
             raise ValidationError('Self-subscription is not allowed.')
-        _, created = Subscription.objects.get_or_create(
+        created = Subscription.objects.create_if_absent(
             subscriber=request.user,
             author=author
         )
         if not created:
             raise ValidationError(f'Already subscribed to {author.username}.')
+        outbox.publish(outbox.topic(Subscription, 'created'), {
+            'subscriber_id': request.user.id,
+            'author_id': author.id,
+        })
 
         serializer = UserWithAdditionalInfoSerializer(
             author,
@@ -249,3 +510,11 @@ class UserViewSet(DjoserUserViewSet):
         user.avatar = None
         user.save(update_fields=['avatar'])
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_pool_metrics(request):
+    """Counters of the async views database pool of this process."""
+    pool = db_connections.pool
+    return Response(pool.metrics() if pool else {'size': 0})
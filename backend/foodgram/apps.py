@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+
+
+class FoodgramConfig(AppConfig):
+    name = 'foodgram'
+
+    def ready(self):
+        from .db_connections import check_connections, mark_connections_idle
+
+        # Connected after Django's own close_old_connections.
+        request_started.connect(check_connections)
+        request_finished.connect(mark_connections_idle)
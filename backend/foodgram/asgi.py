@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
+os.environ.setdefault('ASGI', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,119 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(request):
+    """Content codings of Accept-Encoding, without the ``q=0`` ones."""
+    accepted = set()
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for value in header.split(','):
+        coding, *params = [part.strip() for part in value.split(';')]
+        quality = next(
+            (param[2:] for param in params if param.startswith('q=')), '1'
+        )
+        try:
+            if float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.lower())
+    return accepted
+
+
+def preferred_encoding(request, available=ENCODINGS):
+    accepted = accepted_encodings(request)
+    for encoding in available:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_LEVEL)
+    return gzip.compress(data, settings.COMPRESSION_LEVEL)
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compress chunk by chunk, so the stream is never buffered as a whole.
+    The compressor is flushed every COMPRESSION_STREAM_FLUSH_SIZE bytes
+    of input, tiny chunks don't pay a flush each.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_LEVEL)
+        process, flush = compressor.process, compressor.flush
+        finish = compressor.finish
+    else:
+        # wbits=31 writes the gzip header and trailer.
+        compressor = zlib.compressobj(settings.COMPRESSION_LEVEL, wbits=31)
+        process = compressor.compress
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    pending = 0
+    for chunk in chunks:
+        data = process(chunk)
+        pending += len(chunk)
+        if pending >= settings.COMPRESSION_STREAM_FLUSH_SIZE:
+            data += flush()
+            pending = 0
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    GZipMiddleware with brotli, a size threshold and a content type
+    allowlist, streaming responses are compressed on the fly.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if (
+            response.has_header('Content-Encoding')
+            or not content_type.startswith(settings.COMPRESSION_CONTENT_TYPES)
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = preferred_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Same as GZipMiddleware: the compressed body gets a weak ETag.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
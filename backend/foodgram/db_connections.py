@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import APIException
+
+
+def check_connections(**kwargs):
+    """
+    Drop persistent connections that the server closed while idle,
+    so the request reconnects instead of failing on its first query.
+    Only connections idle for DB_CONN_HEALTH_CHECK_IDLE are pinged.
+    """
+    now = time.monotonic()
+    for conn in connections.all():
+        idle_since = getattr(conn, 'idle_since', None)
+        if (
+            conn.connection is not None
+            and conn.settings_dict.get('CONN_HEALTH_CHECKS')
+            and (
+                idle_since is None
+                or now - idle_since > settings.DB_CONN_HEALTH_CHECK_IDLE
+            )
+            and not conn.is_usable()
+        ):
+            conn.close()
+
+
+def mark_connections_idle(**kwargs):
+    now = time.monotonic()
+    for conn in connections.all():
+        if conn.connection is not None:
+            conn.idle_since = now
+
+
+class PoolTimeout(APIException):
+    status_code = 503
+    default_detail = 'База данных перегружена, повторите запрос позже.'
+    default_code = 'database_pool_timeout'
+
+
+class DatabasePool:
+    """
+    Fixed set of worker threads running ORM calls of the async views.
+    Each thread keeps its own connection for DB_POOL_CONN_MAX_AGE, so
+    the connections are reused across requests even when CONN_MAX_AGE
+    is 0, as it is under ASGI.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            size, thread_name_prefix='db-pool'
+        )
+        self.semaphore = None
+        self.lock = threading.Lock()
+        # Per worker: alias -> (DB-API connection, monotonic open time).
+        self.opened = threading.local()
+        self.stats = {
+            'checkouts': 0, 'waits': 0, 'timeouts': 0, 'in_use': 0
+        }
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.stats[name] += value
+
+    def metrics(self):
+        with self.lock:
+            return {'size': self.size, **self.stats}
+
+    def recycle(self):
+        """
+        close_if_unusable_or_obsolete() with the pool's own max age, it
+        runs before every call instead of at the end of each request.
+        """
+        opened = self.opened.__dict__
+        now = time.monotonic()
+        for conn in connections.all():
+            if conn.connection is None:
+                continue
+            if opened.get(conn.alias, (None,))[0] is not conn.connection:
+                opened[conn.alias] = (conn.connection, now)
+            if conn.get_autocommit() != conn.settings_dict['AUTOCOMMIT']:
+                conn.close()
+                continue
+            if conn.errors_occurred:
+                if conn.is_usable():
+                    conn.errors_occurred = False
+                else:
+                    conn.close()
+                    continue
+            if now - opened[conn.alias][1] > settings.DB_POOL_CONN_MAX_AGE:
+                conn.close()
+
+    def call(self, func, *args, **kwargs):
+        self.recycle()
+        return func(*args, **kwargs)
+
+    async def run(self, func, *args, **kwargs):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.size)
+        if self.semaphore.locked():
+            self.count('waits')
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.count('timeouts')
+            raise PoolTimeout
+        self.count('checkouts')
+        self.count('in_use')
+        try:
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                lambda: context.run(self.call, func, *args, **kwargs)
+            )
+        finally:
+            self.count('in_use', -1)
+            self.semaphore.release()
+
+
+pool = (
+    DatabasePool(settings.DB_POOL_SIZE, settings.DB_POOL_TIMEOUT)
+    if settings.DB_POOL_SIZE else None
+)
+
+
+def database_sync_to_async(func):
+    """sync_to_async for ORM calls, served by the pool if any."""
+    if pool is None:
+        return sync_to_async(func)
+
+    async def wrapper(*args, **kwargs):
+        return await pool.run(func, *args, **kwargs)
+    return wrapper
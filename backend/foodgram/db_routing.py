@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.utils.deprecation import MiddlewareMixin
+
+# Replica alias chosen for the current request, None means the primary.
+_read_alias = ContextVar('read_alias', default=None)
+# Replica alias -> monotonic time until which it is considered down.
+_down_until = {}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# DatabaseCache entries: versions, idempotency keys and throttle counters
+# must not be read behind the writes.
+PRIMARY_ONLY_APPS = ('django_cache',)
+
+
+def replica_aliases():
+    return [
+        alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS
+    ]
+
+
+def mark_down(alias):
+    _down_until[alias] = time.monotonic() + settings.DB_REPLICA_RETRY_AFTER
+
+
+def healthy_replicas():
+    now = time.monotonic()
+    return [
+        alias for alias in replica_aliases()
+        if _down_until.get(alias, 0) <= now
+    ]
+
+
+def pin_key(request):
+    """Cache key of the client: its token or session, None if anonymous."""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    return 'db-pin:' + hashlib.sha1(credentials.encode()).hexdigest()
+
+
+class ReplicaRouter:
+    """Reads of safe requests go to a replica, everything else to primary."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if (
+            alias is None
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        try:
+            connections[alias].ensure_connection()
+        except OperationalError:
+            mark_down(alias)
+            _read_alias.set(None)
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # All aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+def choose_alias(request, pinned):
+    """A random healthy replica for safe unpinned requests, else None."""
+    if request.method not in SAFE_METHODS or pinned:
+        return None
+    replicas = healthy_replicas()
+    return random.choice(replicas) if replicas else None
+
+
+def pins(request, response):
+    return request.method not in SAFE_METHODS and response.status_code < 400
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Routes reads of safe requests to a replica and pins the client
+    to the primary for DB_REPLICA_PIN_SECONDS after a write.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        key = pin_key(request)
+        pinned = key and request.method in SAFE_METHODS and cache.get(key)
+        token = _read_alias.set(choose_alias(request, pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if key and pins(request, response):
+            cache.set(key, True, settings.DB_REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        key = pin_key(request)
+        pinned = (
+            key and request.method in SAFE_METHODS
+            and await sync_to_async(cache.get)(key)
+        )
+        token = _read_alias.set(choose_alias(request, pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if key and pins(request, response):
+            await sync_to_async(cache.set)(
+                key, True, settings.DB_REPLICA_PIN_SECONDS
+            )
+        return response
+
+    def process_exception(self, request, exception):
+        alias = _read_alias.get()
+        if alias is None or not isinstance(exception, OperationalError):
+            return None
+        # Following requests go to the primary until the replica is
+        # retried, this one is read from the primary again right away.
+        mark_down(alias)
+        _read_alias.set(None)
+        match = request.resolver_match
+        view = match.func
+        if asyncio.iscoroutinefunction(view):
+            # Called from a worker thread by the async handler.
+            view = async_to_sync(view)
+        return view(request, *match.args, **match.kwargs)
@@ -0,0 +1,46 @@
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+
+def content_disposition(filename, as_attachment):
+    disposition = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{disposition}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{disposition}; filename*=utf-8''{quote(filename)}"
+
+
+def internal_url(path):
+    """nginx internal location of a file under one of the served roots."""
+    path = os.path.realpath(path)
+    for root, location in settings.X_ACCEL_LOCATIONS.items():
+        root = os.path.realpath(root)
+        if path.startswith(root + os.sep):
+            return location + quote(os.path.relpath(path, root))
+    raise ValueError(f'{path} is outside of X_ACCEL_LOCATIONS')
+
+
+def deliver_file(path, content_type, filename=None, as_attachment=False):
+    """
+    Response for a file on disk: with FILE_DELIVERY = 'x-accel' nginx sends
+    the bytes by X-Accel-Redirect, otherwise Django streams it (with
+    sendfile if the server has wsgi.file_wrapper).
+    """
+    filename = filename or os.path.basename(path)
+    if settings.FILE_DELIVERY == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = internal_url(path)
+        response['Content-Disposition'] = content_disposition(
+            filename, as_attachment
+        )
+        return response
+    return FileResponse(
+        open(path, 'rb'),
+        content_type=content_type,
+        as_attachment=as_attachment,
+        filename=filename,
+    )
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.module_loading import import_string
+
+_pool = None
+_pool_lock = Lock()
+# Set in the pool workers, where the hashers compute inline.
+_in_pool = False
+
+
+def _mark_pool_worker():
+    global _in_pool
+    _in_pool = True
+
+
+def _call(hasher_path, method, *args):
+    return getattr(import_string(hasher_path)(), method)(*args)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned, not forked: the server process already runs
+                # threads (event loop, DB pool) whose locks a fork copies.
+                _pool = ProcessPoolExecutor(
+                    settings.PASSWORD_HASHING_POOL_SIZE,
+                    mp_context=get_context('spawn'),
+                    initializer=_mark_pool_worker,
+                )
+    return _pool
+
+
+class ProcessPoolHasherMixin:
+    """
+    Runs encode/verify in a bounded process pool, so a login burst uses at
+    most PASSWORD_HASHING_POOL_SIZE cores while the waiting request
+    threads stay idle.
+    """
+
+    def _offload(self, method, *args):
+        if _in_pool or not settings.PASSWORD_HASHING_POOL_SIZE:
+            return getattr(super(), method)(*args)
+        path = f'{type(self).__module__}.{type(self).__qualname__}'
+        return get_pool().submit(_call, path, method, *args).result()
+
+    def encode(self, password, salt, *args):
+        return self._offload('encode', password, salt, *args)
+
+    def verify(self, password, encoded):
+        return self._offload('verify', password, encoded)
+
+
+class Argon2PasswordHasher(
+    ProcessPoolHasherMixin, hashers.Argon2PasswordHasher
+):
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(
+    ProcessPoolHasherMixin, hashers.BCryptSHA256PasswordHasher
+):
+    rounds = settings.BCRYPT_ROUNDS
+
+
+class PBKDF2PasswordHasher(
+    ProcessPoolHasherMixin, hashers.PBKDF2PasswordHasher
+):
+    iterations = (
+        settings.PBKDF2_ITERATIONS or hashers.PBKDF2PasswordHasher.iterations
+    )
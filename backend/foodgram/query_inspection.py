@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.fields import Field
+from rest_framework.serializers import Serializer
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = str(Path(settings.BASE_DIR))
+# Middleware and installed packages are not origins, app code is.
+EXCLUDED_PATHS = (
+    str(Path(__file__).parent), 'site-packages', 'dist-packages'
+)
+
+IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+WHITESPACE = re.compile(r'\s+')
+
+# Inspector of the current async request, its queries run in the worker
+# threads of sync_to_async and the pool.
+_inspector = ContextVar('query_inspector', default=None)
+
+
+class NPlusOneQueries(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """SQL with the IN lists collapsed, equal for N+1 repetitions."""
+    return IN_LIST.sub('IN (...)', WHITESPACE.sub(' ', sql))
+
+
+def project_origin(frame):
+    """``path:line in function`` of the innermost project frame."""
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(PROJECT_ROOT) and not any(
+            excluded in path for excluded in EXCLUDED_PATHS
+        ):
+            return (
+                f'{Path(path).relative_to(PROJECT_ROOT)}:{frame.f_lineno}'
+                f' in {frame.f_code.co_name}'
+            )
+        frame = frame.f_back
+    return None
+
+
+def serializer_field(frame):
+    """
+    ``Serializer.field`` being serialized when the query ran. A serializer
+    iterating its own fields is skipped, its field reading a relation is not.
+    """
+    while frame is not None:
+        field = frame.f_locals.get('self')
+        if (
+            isinstance(field, Field)
+            and field.field_name
+            and field.parent is not None
+            and (
+                frame.f_code.co_name == 'get_attribute'
+                or frame.f_code.co_name == 'to_representation'
+                and not isinstance(field, Serializer)
+            )
+        ):
+            return f'{type(field.parent).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryInspector:
+    """
+    ``execute_wrapper`` logging slow queries and collecting the query
+    shapes, ``report`` then flags the shapes repeated N+1 style.
+    """
+
+    def __init__(self, label, strict=None):
+        self.label = label
+        self.strict = (
+            settings.QUERY_INSPECTION_STRICT if strict is None else strict
+        )
+        self.slow_seconds = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.shapes = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            frame = sys._getframe(1)
+            origin = project_origin(frame)
+            self.shapes[query_shape(sql)].append(
+                (serializer_field(frame), origin)
+            )
+            if duration >= self.slow_seconds:
+                logger.warning(
+                    'Slow query (%.1f ms) in %s from %s: %s',
+                    duration * 1000, self.label,
+                    origin or 'library code', sql
+                )
+
+    def repeated(self):
+        """(count, shape, field, origin) of every N+1 query shape."""
+        return [
+            (len(calls), shape, *calls[-1])
+            for shape, calls in self.shapes.items()
+            if len(calls) >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def report(self):
+        repeated = self.repeated()
+        for count, shape, field, origin in repeated:
+            logger.warning(
+                'N+1 in %s: %d queries from %s (%s): %s',
+                self.label, count, field or 'no serializer field',
+                origin or 'library code', shape
+            )
+        if repeated and self.strict:
+            raise NPlusOneQueries('\n'.join(
+                f'{count} x {field or origin or self.label}: {shape}'
+                for count, shape, field, origin in repeated
+            ))
+
+
+@contextmanager
+def inspect_queries(label='block', strict=None):
+    """
+    Inspect the queries of every connection of the current thread, in
+    strict mode N+1 repetitions raise ``NPlusOneQueries`` on exit::
+
+        with inspect_queries('subscriptions', strict=True):
+            UserWithAdditionalInfoSerializer(users, many=True).data
+    """
+    inspector = QueryInspector(label, strict)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+    inspector.report()
+
+
+def dispatch(execute, sql, params, many, context):
+    """``execute_wrapper`` handing the query to the context's inspector."""
+    inspector = _inspector.get()
+    if inspector is None:
+        return execute(sql, params, many, context)
+    return inspector(execute, sql, params, many, context)
+
+
+def install_dispatch(connection, **kwargs):
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+class QueryInspectionMiddleware(MiddlewareMixin):
+    """Per-request slow query log and N+1 detector, see QUERY_INSPECTION."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Worker threads open their connections later, on demand.
+            connection_created.connect(
+                install_dispatch, dispatch_uid='query_inspection'
+            )
+            for connection in connections.all():
+                install_dispatch(connection)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with inspect_queries(f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        inspector = QueryInspector(f'{request.method} {request.path}')
+        token = _inspector.set(inspector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _inspector.reset(token)
+        inspector.report()
+        return response
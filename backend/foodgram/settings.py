@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -22,6 +24,8 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# Per-user exports, never served directly.
+PROTECTED_MEDIA_ROOT = os.path.join(BASE_DIR, 'protected')
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -31,6 +35,20 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-insecure-default-key-for-dev-only')
 DEBUG = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',')
+# Set by foodgram/asgi.py.
+ASGI = os.getenv('ASGI', 'False').lower() in ('true', '1', 't')
+# 'django' streams files from Python, 'x-accel' hands them to an nginx
+# with the internal X_ACCEL_LOCATIONS (set in docker-compose.yml).
+FILE_DELIVERY = os.getenv('FILE_DELIVERY', 'django')
+# root on disk -> internal nginx location
+X_ACCEL_LOCATIONS = {
+    PROTECTED_MEDIA_ROOT: '/internal/protected/',
+    MEDIA_ROOT: '/internal/media/',
+}
+# Native async GET views for the read-heavy endpoints (ASGI deployment).
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', 'False'
+).lower() in ('true', '1', 't')
 
 
 AUTH_USER_MODEL = 'recipes.User'
@@ -46,6 +64,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'django_filters',
     'djoser',
+    'foodgram',
     'recipes',
     'api',
 ]
@@ -57,6 +76,7 @@ if DEBUG:
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,6 +103,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+ASGI_APPLICATION = 'foodgram.asgi.application'
 
 
 # Database
@@ -96,6 +117,71 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', ''),
+        # seconds, 0 closes the connection after each request. Off under
+        # ASGI, where request threads don't live long enough to reuse it.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0 if ASGI else 60)),
+        # Ping reused connections idle for DB_CONN_HEALTH_CHECK_IDLE
+        # seconds at the start of a request.
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ).lower() in ('true', '1', 't'),
+    }
+}
+# seconds
+DB_CONN_HEALTH_CHECK_IDLE = int(os.getenv('DB_CONN_HEALTH_CHECK_IDLE', 30))
+# Worker threads with persistent connections for the async views and
+# their write fallbacks, the connection reuse under ASGI. 0 disables it.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10 if ASGI else 0))
+# seconds to wait for a free pool worker
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+# seconds a pool worker keeps its connection
+DB_POOL_CONN_MAX_AGE = int(os.getenv('DB_POOL_CONN_MAX_AGE', 60))
+
+# Comma-separated read replicas: hosts, or database files for SQLite.
+DB_REPLICAS = [
+    replica for replica in os.getenv('DB_REPLICAS', '').split(',') if replica
+]
+REPLICA_SETTING = (
+    'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+)
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        REPLICA_SETTING: replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+if DB_REPLICAS:
+    DATABASE_ROUTERS = ['foodgram.db_routing.ReplicaRouter']
+    MIDDLEWARE.append('foodgram.db_routing.ReplicaRoutingMiddleware')
+# seconds
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+DB_REPLICA_RETRY_AFTER = 30
+
+# Slow query log and N+1 detector for development and staging, strict
+# mode raises on N+1 queries instead of only logging them.
+QUERY_INSPECTION = os.getenv(
+    'QUERY_INSPECTION', str(DEBUG)
+).lower() in ('true', '1', 't')
+QUERY_INSPECTION_STRICT = os.getenv(
+    'QUERY_INSPECTION_STRICT', 'False'
+).lower() in ('true', '1', 't')
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+# Same-shape queries in one request from which they count as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+if QUERY_INSPECTION:
+    MIDDLEWARE.append('foodgram.query_inspection.QueryInspectionMiddleware')
+
+
+# Shared by all the processes: list and catalogue versions, replica pins,
+# idempotency locks and throttles. The database table needs
+# `manage.py createcachetable`, Docker runs memcached instead.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
     }
 }
 
@@ -119,6 +205,48 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Preferred hasher: 'argon2' or 'bcrypt' when their library is installed,
+# otherwise 'pbkdf2'. Passwords of the other hashers are still accepted
+# and rehashed with the preferred one on the next login.
+PASSWORD_HASHER_LIBRARIES = {
+    'argon2': 'argon2',
+    'bcrypt': 'bcrypt',
+    'pbkdf2': 'hashlib',
+}
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'foodgram.hashers.Argon2PasswordHasher',
+    'bcrypt': 'foodgram.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'foodgram.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'argon2')
+if PASSWORD_HASHER not in PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(
+        f'PASSWORD_HASHER must be one of '
+        f'{", ".join(PASSWORD_HASHER_CLASSES)}, not {PASSWORD_HASHER!r}.'
+    )
+if not find_spec(PASSWORD_HASHER_LIBRARIES[PASSWORD_HASHER]):
+    PASSWORD_HASHER = 'pbkdf2'
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(
+        path for name, path in PASSWORD_HASHER_CLASSES.items()
+        if name != PASSWORD_HASHER
+    ),
+]
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+# KiB
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 64 * 1024))
+# One lane per hash, the process pool gives the parallelism.
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 1))
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+# 0 keeps Django's default
+PBKDF2_ITERATIONS = int(os.getenv('PBKDF2_ITERATIONS', 0))
+# Worker processes hashing passwords, 0 hashes in the request thread.
+PASSWORD_HASHING_POOL_SIZE = int(os.getenv(
+    'PASSWORD_HASHING_POOL_SIZE', max(1, (os.cpu_count() or 2) // 2)
+))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -142,6 +270,15 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
@@ -152,8 +289,11 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'relation_writes': os.getenv('RELATION_WRITES_RATE', '60/min'),
+    },
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -166,6 +306,7 @@ SPECTACULAR_SETTINGS = {
 
 DJOSER = {
     'SERIALIZERS': {
+        'user_create': 'api.serializers.UserCreateSerializer',
         'current_user': 'api.serializers.BaseUserSerializer',
         'user': 'api.serializers.BaseUserSerializer',
     },
@@ -177,9 +318,82 @@ DJOSER = {
 }
 
 RECIPE_IMAGE_SIZE = (800, 800)
+# Boxes served by /media-resize/<w>x<h>/, the aspect ratio is kept.
+IMAGE_VARIANT_SIZES = {(150, 150), (300, 300), (600, 600), RECIPE_IMAGE_SIZE}
+IMAGE_VARIANTS_ROOT = os.path.join(MEDIA_ROOT, 'variants')
+IMAGE_VARIANTS_MAX_BYTES = int(
+    os.getenv('IMAGE_VARIANTS_MAX_BYTES', 512 * 1024 * 1024)
+)
+IMAGE_VARIANT_QUALITY = 80
+# seconds
+IMAGE_VARIANTS_MAX_AGE = 30 * 24 * 60 * 60
 
 RECIPE_IMAGES_MEDIA_PATH = "recipes/images"
 USER_AVATARS_MEDIA_PATH = "recipes/avatars"
 
+# Responses of these types and at least this many bytes are compressed.
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+COMPRESSION_MIN_SIZE = 512
+# 1-9 for gzip, 0-11 for brotli
+COMPRESSION_LEVEL = 5
+COMPRESSION_STREAM_FLUSH_SIZE = 16 * 1024
+
 # 4 mb
 DEFAULT_CLIENT_MAX_FILESIZE = 4 * 1024 * 1024
+
+# Max recipe ids in one bulk favorite/shopping cart or batch request
+BULK_RECIPES_MAX_SIZE = 100
+
+# seconds
+IDEMPOTENCY_KEY_TIMEOUT = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Registration queries username/email uniqueness only for values the
+# Bloom filter of the existing ones may contain.
+USER_BLOOM_ERROR_RATE = 0.01
+USER_BLOOM_SPARE_CAPACITY = 10_000
+# seconds
+USER_BLOOM_REBUILD_INTERVAL = 5 * 60
+
+SHORT_LINK_CACHE_SIZE = 10_000
+# seconds
+SHORT_LINK_CACHE_TTL = 24 * 60 * 60
+SHORT_LINK_NEGATIVE_CACHE_TTL = 60
+SHOPPING_LIST_CACHE_TIMEOUT = 10 * 60
+# Clients revalidate the full ingredient catalogue with its ETag.
+INGREDIENT_CATALOGUE_MAX_AGE = 24 * 60 * 60
+# seconds between ingredient count checks of each catalogue version
+INGREDIENT_CATALOGUE_ROWS_TIMEOUT = 60
+
+RECIPE_NEIGHBORS_TOP_K = 10
+
+# Processes further behind than this many ingredient changes rebuild
+# their ingredient index instead of patching it from the change log.
+INGREDIENT_INDEX_MAX_PATCH = 1000
+# seconds
+INGREDIENT_INDEX_CHANGE_TIMEOUT = 60 * 60
+
+# topic pattern (fnmatch) -> handlers called with a list of events
+OUTBOX_HANDLERS = {
+    'favorite.created': ['recipes.outbox.update_recipe_neighbors'],
+    'cart.created': ['recipes.outbox.update_recipe_neighbors'],
+}
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 10
+# seconds, doubled on every failed attempt
+OUTBOX_RETRY_DELAY = 5
+OUTBOX_RETENTION_DAYS = 7
+INGREDIENT_SEARCH_MAX_IDS = 50
+
+# Tables smaller than this are always counted exactly.
+ESTIMATED_COUNT_THRESHOLD = 10_000
+# 'estimated' uses planner estimates and cached counts on PostgreSQL,
+# 'exact' always runs COUNT(*).
+PAGINATION_COUNT = os.getenv('PAGINATION_COUNT', 'estimated')
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
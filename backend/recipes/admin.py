@@ -1,5 +1,6 @@
 from django.contrib import admin
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.admin import UserAdmin
 from django.utils.safestring import mark_safe
 
@@ -10,8 +11,26 @@ from .models import (
     Ingredient,
     Recipe,
     AmountIngredient,
+    OutboxEvent,
+    Subscription,
+    UnitConversion,
     User
 )
+from .pagination import EstimatedCountPaginator
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0
+    )
 
 
 @admin.register(User)
@@ -26,6 +45,8 @@ class UserAdminConfig(UserAdmin):
         "subscriptions_count",
         "subscribers_count",
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     @admin.display(description="ФИО")
     def full_name(self, user):
@@ -39,17 +60,25 @@ class UserAdminConfig(UserAdmin):
             "height="50" style="object-fit: cover; border-radius: 4px;" />'
         return ""
 
-    @admin.display(description="Рецепты")
+    @admin.display(description="Рецепты", ordering='recipes_count')
     def recipes_count(self, user):
-        return user.recipes.count()
+        return user.recipes_count
 
-    @admin.display(description="Подписки")
+    @admin.display(description="Подписки", ordering='subscriptions_count')
     def subscriptions_count(self, user):
-        return user.subscriptions.count()
+        return user.subscriptions_count
 
-    @admin.display(description="Подписчики")
+    @admin.display(description="Подписчики", ordering='subscribers_count')
     def subscribers_count(self, user):
-        return user.authors.count()
+        return user.subscribers_count
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return queryset.annotate(
+            recipes_count=count_subquery(Recipe, 'author'),
+            subscriptions_count=count_subquery(Subscription, 'subscriber'),
+            subscribers_count=count_subquery(Subscription, 'author'),
+        )
 
 
 @admin.register(Ingredient)
@@ -70,6 +99,12 @@ class IngredientAdmin(admin.ModelAdmin):
         )
 
 
+@admin.register(UnitConversion)
+class UnitConversionAdmin(admin.ModelAdmin):
+    list_display = ('unit', 'base_unit', 'factor')
+    search_fields = ('unit', 'base_unit')
+
+
 class AmountIngredientInline(admin.TabularInline):
     model = AmountIngredient
     extra = 1
@@ -91,6 +126,8 @@ class RecipeAdmin(admin.ModelAdmin):
     list_select_related = ('author',)
     search_fields = ('name', 'author__username')
     inlines = (AmountIngredientInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     @admin.display(description="В избранном", ordering='favorites_count')
     def favorites_count(self, recipe):
@@ -99,7 +136,7 @@ class RecipeAdmin(admin.ModelAdmin):
     @admin.display(description="Ингредиенты")
     @mark_safe
     def ingredients_list(self, recipe):
-        amounts = recipe.ingredient_amounts.select_related('ingredient').all()
+        amounts = recipe.ingredient_amounts.all()
         items = '<br>'.join(
             f'{ai.ingredient.name} — '
             f'{ai.amount} {ai.ingredient.measurement_unit}'
@@ -123,11 +160,26 @@ class RecipeAdmin(admin.ModelAdmin):
             'ingredient_amounts__ingredient',
         )
         return queryset.annotate(
-            favorites_count=Count('favorites', distinct=True)
+            favorites_count=count_subquery(Favorite, 'recipe')
         )
 
 
 @admin.register(Favorite, Cart)
 class FavoriteAndCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'topic', 'created_at', 'attempts', 'processed_at')
+    list_filter = ('topic',)
+    readonly_fields = (
+        'topic', 'payload', 'created_at', 'attempts', 'last_error',
+        'processed_at',
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,93 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from .models import User
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for number in range(self.hashes):
+            yield (first + number * second) % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class UserIdentifiers:
+    """
+    Lowercased usernames and emails of the registered users, rebuilt
+    every USER_BLOOM_REBUILD_INTERVAL seconds. A miss means the value is
+    definitely free as of the last build, users registered through this
+    process since then are added on the fly.
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def build(self):
+        # A username and an email per user, plus room for the new ones.
+        capacity = (
+            User.objects.count() * 2 + settings.USER_BLOOM_SPARE_CAPACITY
+        )
+        bloom = BloomFilter(capacity, settings.USER_BLOOM_ERROR_RATE)
+        for username, email in (
+            User.objects.values_list('username', 'email').iterator()
+        ):
+            bloom.add(username.lower())
+            bloom.add(email.lower())
+        self._filter = bloom
+        self._built_at = time.monotonic()
+
+    def _current(self):
+        stale = (
+            time.monotonic() - self._built_at
+            > settings.USER_BLOOM_REBUILD_INTERVAL
+        )
+        if self._filter is None:
+            with self._lock:
+                if self._filter is None:
+                    self.build()
+        elif stale and self._lock.acquire(blocking=False):
+            # Other threads keep using the previous filter meanwhile.
+            try:
+                self.build()
+            finally:
+                self._lock.release()
+        return self._filter
+
+    def add(self, *values):
+        if self._filter is not None:
+            for value in values:
+                self._filter.add(value.lower())
+
+    def may_exist(self, value):
+        return value.lower() in self._current()
+
+
+user_identifiers = UserIdentifiers()
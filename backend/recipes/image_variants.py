@@ -0,0 +1,143 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Bytes of all the cached variants, shared by the processes of the host.
+SIZE_KEY = 'image_variants:size'
+
+
+class VariantError(Exception):
+    """Unknown size, missing or unreadable original."""
+
+
+def source_path(path):
+    """Original under MEDIA_ROOT, never one of the cached variants."""
+    media_root = Path(settings.MEDIA_ROOT).resolve()
+    source = (media_root / path).resolve()
+    variants_root = Path(settings.IMAGE_VARIANTS_ROOT).resolve()
+    if (
+        media_root not in source.parents
+        or variants_root == source
+        or variants_root in source.parents
+        or not source.is_file()
+    ):
+        raise VariantError(path)
+    return source
+
+
+def variant_path(source, width, height):
+    relative = source.relative_to(Path(settings.MEDIA_ROOT).resolve())
+    return Path(
+        settings.IMAGE_VARIANTS_ROOT, f'{width}x{height}', f'{relative}.webp'
+    )
+
+
+@contextmanager
+def locked(path):
+    """Per-variant lock shared by all processes of the host."""
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def render(source, target, width, height):
+    temporary = target.with_name(f'{uuid4().hex}.tmp')
+    try:
+        try:
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((width, height), Image.LANCZOS)
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA')
+                image.save(
+                    temporary, 'WEBP', quality=settings.IMAGE_VARIANT_QUALITY
+                )
+        except (OSError, UnidentifiedImageError) as error:
+            raise VariantError(source) from error
+        os.replace(temporary, target)
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def is_fresh(target, source):
+    try:
+        return target.stat().st_mtime >= source.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def get_variant(path, width, height):
+    """
+    Path of the resized copy of the media file ``path``, rendered on the
+    first request. Concurrent requests for the same variant wait for the
+    one rendering it instead of rendering it again.
+    """
+    if (width, height) not in settings.IMAGE_VARIANT_SIZES:
+        raise VariantError(f'{width}x{height}')
+    source = source_path(path)
+    target = variant_path(source, width, height)
+    if is_fresh(target, source):
+        # mtime is the LRU clock of the eviction.
+        os.utime(target)
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with locked(target):
+        if not is_fresh(target, source):
+            render(source, target, width, height)
+            account(target)
+    return target
+
+
+def account(rendered):
+    """
+    Add a new variant to the running total, the directory is scanned
+    only when the total is over the budget or unknown.
+    """
+    try:
+        total = cache.incr(SIZE_KEY, rendered.stat().st_size)
+    except ValueError:
+        total = None
+    if total is None or total > settings.IMAGE_VARIANTS_MAX_BYTES:
+        # Renders counted during the scan are lost, the next scan
+        # corrects the total.
+        cache.set(SIZE_KEY, evict(keep=rendered), None)
+
+
+def evict(keep=None):
+    """
+    Drop the least recently used variants above the size budget, returns
+    the size of the remaining ones.
+    """
+    files = []
+    total = 0
+    for path in Path(settings.IMAGE_VARIANTS_ROOT).rglob('*.webp'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    if total <= settings.IMAGE_VARIANTS_MAX_BYTES:
+        return total
+    # Evict down to 90% so every render doesn't trigger a new scan.
+    budget = settings.IMAGE_VARIANTS_MAX_BYTES * 0.9
+    for _, size, path in sorted(files):
+        if total <= budget:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        Path(f'{path}.lock').unlink(missing_ok=True)
+        total -= size
+    return total
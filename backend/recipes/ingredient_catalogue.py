@@ -0,0 +1,37 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Ingredient
+
+CATALOGUE_EDIT_KEY = 'ingredients:catalogue_edit'
+CATALOGUE_ROWS_KEY = 'ingredients:catalogue_rows'
+
+
+def get_catalogue_version():
+    """
+    Changes with every bump, and with the ingredient count or last id
+    at most INGREDIENT_CATALOGUE_ROWS_TIMEOUT after rows were added or
+    deleted, even by a process that does not share this cache.
+    """
+    state = cache.get_many([CATALOGUE_EDIT_KEY, CATALOGUE_ROWS_KEY])
+    if CATALOGUE_EDIT_KEY not in state:
+        cache.add(CATALOGUE_EDIT_KEY, uuid4().hex, None)
+        state[CATALOGUE_EDIT_KEY] = cache.get(CATALOGUE_EDIT_KEY)
+    if CATALOGUE_ROWS_KEY not in state:
+        rows = Ingredient.objects.aggregate(count=Count('id'), last=Max('id'))
+        state[CATALOGUE_ROWS_KEY] = f"{rows['count']}-{rows['last']}"
+        cache.set(
+            CATALOGUE_ROWS_KEY,
+            state[CATALOGUE_ROWS_KEY],
+            settings.INGREDIENT_CATALOGUE_ROWS_TIMEOUT
+        )
+    return f'{state[CATALOGUE_ROWS_KEY]}-{state[CATALOGUE_EDIT_KEY]}'
+
+
+def bump_catalogue_version():
+    """Make every process rebuild its precompiled ingredient catalogue."""
+    cache.set(CATALOGUE_EDIT_KEY, uuid4().hex, None)
+    cache.delete(CATALOGUE_ROWS_KEY)
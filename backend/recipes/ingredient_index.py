@@ -0,0 +1,343 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AmountIngredient
+
+VERSION_KEY = 'ingredient_index:version'
+# Changes to a new cache (e.g. after a memcached restart).
+EPOCH_KEY = 'ingredient_index:epoch'
+CHANGE_KEY = 'ingredient_index:change:{}'
+
+NONZERO_BYTE = re.compile(b'[^\x00]')
+
+
+def to_bitset(recipe_ids):
+    """Python int with the bits of ``recipe_ids`` set."""
+    if not recipe_ids:
+        return 0
+    data = bytearray(max(recipe_ids) // 8 + 1)
+    for recipe_id in recipe_ids:
+        data[recipe_id >> 3] |= 1 << (recipe_id & 7)
+    return int.from_bytes(data, 'little')
+
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+
+def bit_positions(bits, limit):
+    """The first ``limit`` set bits of ``bits``, lowest first."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    positions = []
+    for match in NONZERO_BYTE.finditer(data):
+        byte, start = data[match.start()], match.start() * 8
+        for bit in range(8):
+            if byte >> bit & 1:
+                positions.append(start + bit)
+                if len(positions) == limit:
+                    return positions
+    return positions
+
+
+def add_bits(planes, bits):
+    """Add 1 to the bit-sliced counters ``planes`` at every bit of ``bits``."""
+    for position, plane in enumerate(planes):
+        planes[position], bits = plane ^ bits, plane & bits
+        if not bits:
+            return
+    planes.append(bits)
+
+
+def subtract_bits(minuend, subtrahend):
+    """Bit-sliced ``minuend - subtrahend``, both non-negative, no underflow."""
+    width = max(len(minuend), len(subtrahend))
+    minuend = minuend + [0] * (width - len(minuend))
+    subtrahend = subtrahend + [0] * (width - len(subtrahend))
+    difference, borrow = [], 0
+    for left, right in zip(minuend, subtrahend):
+        difference.append(left ^ right ^ borrow)
+        borrow = (~left & right) | (~(left ^ right) & borrow)
+    return difference
+
+
+def equal_bits(planes, value, within):
+    """Bits of ``within`` whose bit-sliced counter equals ``value``."""
+    if value >> len(planes):
+        return 0
+    for position, plane in enumerate(planes):
+        within &= plane if value >> position & 1 else ~plane
+    return within
+
+
+class IngredientIndex:
+    """
+    In-memory inverted index ingredient -> sorted recipe ids.
+
+    Frequent ingredients also keep a bitset of their recipes (a Python
+    int), rare ones are turned into one per search. Recipe sizes and the
+    matched counts of a search are bit-sliced counters, so a search is a
+    handful of big-int operations per query ingredient, and ranking
+    stops at the first ``n`` recipes instead of sorting all matches.
+
+    Every change of recipe ingredients gets the next shared version, with
+    the recipe id logged under it. Processes patch their index from the
+    log entries after their own version and rebuild only when they are
+    too far behind or entries were lost.
+    """
+
+    # An ingredient keeps a bitset when it is at most twice the size of
+    # its postings: in at least 1/64 of the recipes.
+    DENSE_RATIO = 64
+
+    def __init__(self, chunk_size=10000):
+        self.chunk_size = chunk_size
+        self._postings = {}
+        self._bitsets = {}
+        # Number of ingredients per recipe, indexed by recipe id, and the
+        # same as bit-sliced counters.
+        self._sizes = array('H')
+        self._size_planes = []
+        # Recipe id -> its ingredients: offsets into a flat array, patched
+        # recipes are kept aside.
+        self._offsets = array('I')
+        self._recipe_ingredients = array('I')
+        self._patched = {}
+        self._epoch = None
+        self._version = None
+        self._pending = set()
+        self._lock = threading.RLock()
+
+    def build(self):
+        # Read first: changes made during the scan are patched again.
+        epoch, version = self._shared_state()
+        self.load(
+            AmountIngredient.objects
+            .order_by('recipe_id', 'ingredient_id')
+            .values_list('recipe_id', 'ingredient_id')
+            .iterator(chunk_size=self.chunk_size),
+            epoch, version
+        )
+
+    def load(self, rows, epoch=None, version=None):
+        """Replace the index with ``(recipe_id, ingredient_id)`` rows
+        ordered by recipe id."""
+        postings = {}
+        sizes = array('H')
+        offsets = array('I', [0])
+        recipe_ingredients = array('I')
+        for recipe_id, ingredient_id in rows:
+            if recipe_id >= len(offsets):
+                offsets.extend(
+                    [len(recipe_ingredients)] * (recipe_id + 1 - len(offsets))
+                )
+                self._grow(sizes, recipe_id)
+            recipe_ids = postings.get(ingredient_id)
+            if recipe_ids is None:
+                recipe_ids = postings[ingredient_id] = array('I')
+            recipe_ids.append(recipe_id)
+            recipe_ingredients.append(ingredient_id)
+            sizes[recipe_id] += 1
+        offsets.append(len(recipe_ingredients))
+
+        dense = len(sizes) // self.DENSE_RATIO
+        bitsets = {
+            ingredient_id: to_bitset(recipe_ids)
+            for ingredient_id, recipe_ids in postings.items()
+            if len(recipe_ids) > dense
+        }
+        by_size = {}
+        for recipe_id, size in enumerate(sizes):
+            if size:
+                by_size.setdefault(size, []).append(recipe_id)
+        size_planes = [0] * max(by_size, default=0).bit_length()
+        for size, recipe_ids in by_size.items():
+            bits = to_bitset(recipe_ids)
+            for position in range(size.bit_length()):
+                if size >> position & 1:
+                    size_planes[position] |= bits
+        with self._lock:
+            self._postings = postings
+            self._bitsets = bitsets
+            self._sizes = sizes
+            self._size_planes = size_planes
+            self._offsets = offsets
+            self._recipe_ingredients = recipe_ingredients
+            self._patched = {}
+            self._epoch = epoch
+            self._version = version
+
+    def search(self, ingredient_ids):
+        """
+        Rank the recipes containing any of ``ingredient_ids``.
+
+        Returns the number of found recipes and a function that gives the
+        first ``n`` ``(recipe_id, matched, missing)`` triples ordered by the
+        number of missing ingredients, then by the number of matched ones.
+        """
+        self._catch_up()
+        found, matched_planes = 0, []
+        with self._lock:
+            for ingredient_id in set(ingredient_ids):
+                bits = self._bitsets.get(ingredient_id)
+                if bits is None:
+                    bits = to_bitset(self._postings.get(ingredient_id, ()))
+                found |= bits
+                add_bits(matched_planes, bits)
+            # Ints are immutable, patches replace them.
+            size_planes = [plane & found for plane in self._size_planes]
+        missing_planes = subtract_bits(size_planes, matched_planes)
+        most_matched = (1 << len(matched_planes)) - 1
+
+        def top(n):
+            ranked = []
+            missing = 0
+            left = found
+            while left and len(ranked) < n:
+                level = equal_bits(missing_planes, missing, left)
+                left ^= level
+                matched = most_matched
+                while level and len(ranked) < n:
+                    group = equal_bits(matched_planes, matched, level)
+                    level ^= group
+                    if group:
+                        ranked += [
+                            (recipe_id, matched, missing)
+                            for recipe_id in bit_positions(
+                                group, n - len(ranked)
+                            )
+                        ]
+                    matched -= 1
+                missing += 1
+            return ranked
+
+        return popcount(found), top
+
+    def schedule_refresh(self, recipe_id):
+        """Re-read the recipe ingredients once the transaction commits."""
+        with self._lock:
+            if recipe_id in self._pending:
+                return
+            self._pending.add(recipe_id)
+        transaction.on_commit(lambda: self.refresh_recipe(recipe_id))
+
+    def refresh_recipe(self, recipe_id):
+        with self._lock:
+            self._pending.discard(recipe_id)
+        self._log_change(recipe_id)
+        if self._version is not None:
+            # Not loaded yet: the first search builds it anyway.
+            self._catch_up()
+
+    def _catch_up(self):
+        epoch, version = self._shared_state()
+        if (
+            self._version is None
+            or epoch != self._epoch
+            or not 0 <= version - self._version
+            <= settings.INGREDIENT_INDEX_MAX_PATCH
+        ):
+            self.build()
+            return
+        if version == self._version:
+            return
+        keys = [
+            CHANGE_KEY.format(number)
+            for number in range(self._version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            self.build()
+            return
+        self._patch(set(changes.values()), version)
+
+    def _patch(self, recipe_ids, version):
+        ingredients = {recipe_id: set() for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in (
+            AmountIngredient.objects
+            .filter(recipe_id__in=recipe_ids)
+            .values_list('recipe_id', 'ingredient_id')
+        ):
+            ingredients[recipe_id].add(ingredient_id)
+        with self._lock:
+            # Another thread may have patched past it meanwhile.
+            if self._version is None or self._version >= version:
+                return
+            for recipe_id, ingredient_ids in ingredients.items():
+                self._patch_recipe(recipe_id, ingredient_ids)
+            self._version = version
+
+    def _ingredients_of(self, recipe_id):
+        if recipe_id in self._patched:
+            return self._patched[recipe_id]
+        if recipe_id + 1 >= len(self._offsets):
+            return ()
+        return self._recipe_ingredients[
+            self._offsets[recipe_id]:self._offsets[recipe_id + 1]
+        ]
+
+    def _patch_recipe(self, recipe_id, ingredient_ids):
+        old = set(self._ingredients_of(recipe_id))
+        bit = 1 << recipe_id
+        for ingredient_id in old - ingredient_ids:
+            recipe_ids = self._postings[ingredient_id]
+            del recipe_ids[bisect_left(recipe_ids, recipe_id)]
+            if ingredient_id in self._bitsets:
+                self._bitsets[ingredient_id] &= ~bit
+        for ingredient_id in ingredient_ids - old:
+            insort(
+                self._postings.setdefault(ingredient_id, array('I')),
+                recipe_id
+            )
+            if ingredient_id in self._bitsets:
+                self._bitsets[ingredient_id] |= bit
+        self._patched[recipe_id] = tuple(sorted(ingredient_ids))
+        size = len(ingredient_ids)
+        self._grow(self._sizes, recipe_id)
+        self._sizes[recipe_id] = size
+        planes = self._size_planes
+        planes += [0] * (size.bit_length() - len(planes))
+        for position, plane in enumerate(planes):
+            planes[position] = (
+                plane | bit if size >> position & 1 else plane & ~bit
+            )
+
+    @classmethod
+    def _log_change(cls, recipe_id):
+        while True:
+            try:
+                version = cache.incr(VERSION_KEY)
+            except ValueError:
+                cls._shared_state()
+                continue
+            # add, not set: a cache without atomic incr may hand the same
+            # version out twice, the loser takes the next one.
+            if cache.add(
+                CHANGE_KEY.format(version),
+                recipe_id,
+                settings.INGREDIENT_INDEX_CHANGE_TIMEOUT
+            ):
+                return
+
+    @staticmethod
+    def _shared_state():
+        state = cache.get_many([EPOCH_KEY, VERSION_KEY])
+        if len(state) < 2:
+            cache.add(EPOCH_KEY, uuid4().hex, None)
+            cache.add(VERSION_KEY, 0, None)
+            state = cache.get_many([EPOCH_KEY, VERSION_KEY])
+        return state.get(EPOCH_KEY), state.get(VERSION_KEY, 0)
+
+    @staticmethod
+    def _grow(sizes, recipe_id):
+        if recipe_id >= len(sizes):
+            sizes.extend(bytes(recipe_id + 1 - len(sizes)))
+
+
+index = IngredientIndex()
@@ -0,0 +1,91 @@
+import random
+from itertools import accumulate
+from time import perf_counter
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+
+from recipes.ingredient_index import IngredientIndex
+
+
+class SyntheticIndex(IngredientIndex):
+    """Index of generated recipes, never synced with the database."""
+
+    def _catch_up(self):
+        pass
+
+
+def synthetic_rows(recipes, ingredients, seed=0):
+    """
+    ``(recipe_id, ingredient_id)`` rows of 3-12 ingredients per recipe,
+    ingredient popularity is Zipf-like: the first one is in most recipes.
+    """
+    generator = random.Random(seed)
+    weights = list(accumulate(
+        1 / (rank + 1) ** 1.1 for rank in range(ingredients)
+    ))
+    for recipe_id in range(1, recipes + 1):
+        chosen = generator.choices(
+            range(ingredients), cum_weights=weights,
+            k=generator.randint(3, 12)
+        )
+        for ingredient_id in sorted(set(chosen)):
+            yield recipe_id, ingredient_id
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет поиск рецептов по ингредиентам на сгенерированном '
+        'индексе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=1_000_000,
+            help='Количество сгенерированных рецептов'
+        )
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=2000,
+            help='Количество ингредиентов'
+        )
+        parser.add_argument(
+            '--page',
+            type=int,
+            default=10,
+            help='Размер страницы результатов'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество повторов поиска'
+        )
+
+    def handle(self, *args, **options):
+        index = SyntheticIndex()
+        start = perf_counter()
+        index.load(synthetic_rows(options['recipes'], options['ingredients']))
+        self.stdout.write(
+            f'Индекс построен за {perf_counter() - start:.1f} с'
+        )
+
+        last = options['ingredients'] - 1
+        queries = {
+            'частые ингредиенты': [0, 1, 2, 3, 4],
+            'частые и редкие': [0, last // 40, last // 4, last],
+            'редкие ингредиенты': [last // 2, last],
+        }
+        for name, ingredient_ids in queries.items():
+            count, _ = index.search(ingredient_ids)
+            seconds = timeit(
+                lambda: index.search(ingredient_ids)[1](options['page']),
+                number=options['repeat']
+            )
+            self.stdout.write(
+                f'{name:<20} {seconds / options["repeat"] * 1000:8.3f} мс '
+                f'{count:>10} рецептов'
+            )
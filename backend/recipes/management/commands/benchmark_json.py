@@ -0,0 +1,71 @@
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeSerializer
+from recipes.models import Recipe
+
+
+class AsciiJSONRenderer(JSONRenderer):
+    ensure_ascii = True
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость и размер JSON-рендеринга списка рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=100,
+            help='Количество рецептов в списке'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Количество повторов рендеринга'
+        )
+
+    def handle(self, *args, **options):
+        recipes = list(
+            Recipe.objects
+            .select_related('author')
+            .prefetch_related('ingredient_amounts__ingredient')
+            [:options['size']]
+        )
+        if not recipes:
+            self.stderr.write(self.style.ERROR('В базе нет рецептов.'))
+            return
+
+        results = RecipeSerializer(recipes, many=True).data
+        # Pad the page up to --size with copies of the existing recipes.
+        results = [
+            results[i % len(results)] for i in range(options['size'])
+        ]
+        payload = {
+            'count': len(results),
+            'next': None,
+            'previous': None,
+            'results': results,
+        }
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен, FastJSONRenderer использует json.'
+            ))
+
+        for renderer in (AsciiJSONRenderer(), JSONRenderer(),
+                         FastJSONRenderer()):
+            size = len(renderer.render(payload))
+            seconds = timeit(
+                lambda: renderer.render(payload),
+                number=options['repeat']
+            )
+            self.stdout.write(
+                f'{type(renderer).__name__:<20} '
+                f'{seconds / options["repeat"] * 1000:8.3f} мс '
+                f'{size:>10} байт'
+            )
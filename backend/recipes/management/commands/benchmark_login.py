@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password,
+    get_hasher,
+    make_password,
+)
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет скорость проверки паролей при входе: логинов в секунду '
+        'всего и на одно ядро'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Количество одновременных входов'
+        )
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=200,
+            help='Общее количество проверок пароля'
+        )
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        encoded = make_password('benchmark-password')
+        # Warm up the hashing pool.
+        check_password('benchmark-password', encoded)
+
+        started = perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(
+                lambda _: check_password('benchmark-password', encoded),
+                range(options['logins'])
+            ))
+        elapsed = perf_counter() - started
+
+        if not all(results):
+            self.stderr.write(self.style.ERROR('Пароль не прошёл проверку.'))
+            return
+        cores = min(
+            settings.PASSWORD_HASHING_POOL_SIZE or options['concurrency'],
+            os.cpu_count() or 1,
+        )
+        rate = options['logins'] / elapsed
+        self.stdout.write(
+            f'Алгоритм: {hasher.algorithm}, '
+            f'пул: {settings.PASSWORD_HASHING_POOL_SIZE or "нет"}'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{rate:.1f} логинов/с, {rate / cores:.1f} на ядро '
+            f'(ядер: {cores}), {elapsed / options["logins"] * 1000:.1f} мс '
+            'на проверку'
+        ))
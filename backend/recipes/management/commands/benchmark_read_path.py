@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from time import perf_counter
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест чтения: сравнивает пропускную способность '
+        'запущенных серверов (например, gunicorn WSGI и uvicorn ASGI)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'base_urls',
+            nargs='+',
+            help='Адреса серверов, например http://localhost:8000'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Проверяемый путь, можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Количество одновременных соединений'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Общее количество запросов на каждый путь'
+        )
+        parser.add_argument(
+            '--token',
+            help='Токен пользователя для заголовка Authorization'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [
+            '/api/recipes/',
+            '/api/recipes/1/',
+            '/api/ingredients/?name=%D0%B0',
+        ]
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+
+        for base_url in options['base_urls']:
+            for path in paths:
+                self._run(
+                    base_url.rstrip('/') + path,
+                    headers,
+                    options['concurrency'],
+                    options['requests'],
+                )
+
+    def _run(self, url, headers, concurrency, total):
+        def fetch(_):
+            started = perf_counter()
+            try:
+                with urlopen(Request(url, headers=headers)) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (URLError, OSError):
+                ok = False
+            return ok, perf_counter() - started
+
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, range(total)))
+        elapsed = perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        errors = sum(not ok for ok, _ in results)
+        p50 = median(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f'{url}\n'
+            f'  {total / elapsed:8.1f} запросов/с  '
+            f'p50 {p50 * 1000:7.1f} мс  p95 {p95 * 1000:7.1f} мс  '
+            f'ошибок {errors}'
+        )
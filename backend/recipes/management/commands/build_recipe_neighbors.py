@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import build
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит список похожих рецептов по совместному добавлению '
+        'в избранное и список покупок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все рецепты, а не только затронутые'
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=settings.RECIPE_NEIGHBORS_TOP_K,
+            help='Количество похожих рецептов для каждого рецепта'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Размер пачки при чтении избранного и списков покупок'
+        )
+
+    def handle(self, *args, **options):
+        count = build(
+            top_k=options['top_k'],
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано рецептов: {count}.')
+        )
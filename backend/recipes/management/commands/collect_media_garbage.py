@@ -0,0 +1,129 @@
+import os
+import shutil
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe, User
+
+# Media directory -> (model, file field) referencing its files.
+REFERENCES = {
+    settings.RECIPE_IMAGES_MEDIA_PATH: (Recipe, 'image'),
+    settings.USER_AVATARS_MEDIA_PATH: (User, 'avatar'),
+}
+
+
+def iter_files(directory, min_age):
+    """Files under ``directory`` older than ``min_age`` seconds, lazily."""
+    deadline = time.time() - min_age
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path, min_age)
+            elif (
+                entry.is_file(follow_symlinks=False)
+                and entry.stat(follow_symlinks=False).st_mtime < deadline
+            ):
+                yield entry.path
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def orphans(directory, model, field, batch_size, min_age):
+    """Files of ``directory`` not referenced by ``model.field``."""
+    media_root = Path(settings.MEDIA_ROOT)
+    for paths in batches(iter_files(media_root / directory, min_age),
+                         batch_size):
+        names = {
+            Path(path).relative_to(media_root).as_posix(): path
+            for path in paths
+        }
+        referenced = set(
+            model.objects
+            .filter(**{f'{field}__in': names})
+            .values_list(field, flat=True)
+        )
+        yield from (
+            path for name, path in names.items() if name not in referenced
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет или переносит в карантин файлы изображений рецептов '
+        'и аватаров, на которые не ссылается ни одна запись'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать найденные файлы'
+        )
+        parser.add_argument(
+            '--quarantine',
+            help='Каталог, куда переносить файлы вместо удаления'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество путей в одном запросе к базе'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+        parser.add_argument(
+            '--max-per-second',
+            type=float,
+            default=100,
+            help='Ограничение числа удалений в секунду, 0 - без ограничения'
+        )
+
+    def handle(self, *args, **options):
+        media_root = Path(settings.MEDIA_ROOT)
+        quarantine = options['quarantine'] and Path(options['quarantine'])
+        delay = (
+            1 / options['max_per_second'] if options['max_per_second'] else 0
+        )
+        count = size = 0
+        for directory, (model, field) in REFERENCES.items():
+            for path in orphans(
+                directory, model, field,
+                options['batch_size'], options['min_age']
+            ):
+                count += 1
+                size += os.path.getsize(path)
+                if options['dry_run']:
+                    self.stdout.write(path)
+                    continue
+                if quarantine:
+                    target = quarantine / Path(path).relative_to(media_root)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(path, target)
+                else:
+                    os.remove(path)
+                time.sleep(delay)
+
+        action = (
+            'Найдено' if options['dry_run']
+            else 'Перенесено в карантин' if quarantine
+            else 'Удалено'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} файлов: {count}, {size / 1024 / 1024:.1f} МБ.'
+        ))
@@ -0,0 +1,99 @@
+import re
+from timeit import timeit
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.filters import IngredientFilter, RecipeFilter
+from api.querysets import full_recipes
+from recipes.models import Favorite, Recipe, RecipeNeighbor, User
+from recipes.shopping_list import cart_amounts
+
+SEQUENTIAL_SCANS = {
+    # "Seq Scan on recipes_favorite"
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # "SCAN recipes_favorite", but not "SCAN ... USING (COVERING) INDEX"
+    'sqlite': re.compile(r'SCAN (?:TABLE )?(\w+)\b(?! USING)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для типовых запросов эндпоинтов, '
+        'отмечает последовательные сканирования и замеряет время'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя для пользовательских фильтров'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество повторов для замера времени'
+        )
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(pk=options['user']).first()
+            if options['user'] else User.objects.first()
+        )
+        if user is None:
+            raise CommandError('Нет пользователя для построения запросов.')
+        recipe = Recipe.objects.first()
+        recipe_id = recipe.id if recipe else 0
+        request = SimpleNamespace(user=user)
+
+        queries = {
+            'GET /api/recipes/': full_recipes(user)[:20],
+            'GET /api/recipes/?author=': (
+                full_recipes(user).filter(author=user)[:20]
+            ),
+            'GET /api/recipes/?is_favorited=1': RecipeFilter(
+                {'is_favorited': 1}, full_recipes(user), request=request
+            ).qs[:20],
+            'GET /api/recipes/?is_favorited=0': RecipeFilter(
+                {'is_favorited': 0}, full_recipes(user), request=request
+            ).qs[:20],
+            'GET /api/recipes/?is_in_shopping_cart=1': RecipeFilter(
+                {'is_in_shopping_cart': 1}, full_recipes(user),
+                request=request
+            ).qs[:20],
+            'POST /api/recipes/{id}/favorite/': Favorite.objects.filter(
+                user=user, recipe_id=recipe_id
+            ),
+            'GET /api/recipes/{id}/similar/': RecipeNeighbor.objects.filter(
+                recipe_id=recipe_id
+            ).order_by('-score'),
+            'GET /api/recipes/download_shopping_cart/': (
+                cart_amounts(user)
+            ),
+            'GET /api/users/subscriptions/': User.objects.filter(
+                authors__subscriber=user
+            )[:20],
+            'GET /api/ingredients/?name=': IngredientFilter(
+                {'name': 'а'}
+            ).qs,
+        }
+
+        pattern = SEQUENTIAL_SCANS.get(connection.vendor)
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            seconds = timeit(
+                lambda: list(queryset.all()), number=options['repeat']
+            )
+            scans = sorted(set(pattern.findall(plan))) if pattern else []
+            status = (
+                self.style.WARNING(f'seq scan: {", ".join(scans)}')
+                if scans else self.style.SUCCESS('ok')
+            )
+            self.stdout.write(
+                f'{name:<42} {seconds / options["repeat"] * 1000:8.3f} мс  '
+                f'{status}'
+            )
+            if options['verbosity'] > 1:
+                self.stdout.write(plan + '\n')
@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from recipes.ingredient_catalogue import bump_catalogue_version
 from recipes.models import Ingredient
 
 
@@ -58,6 +59,7 @@ class Command(BaseCommand):
 
             if created_count > 0:
                 Ingredient.objects.bulk_create(new_ingredients)
+                transaction.on_commit(bump_catalogue_version)
 
         self.stdout.write(
             self.style.SUCCESS(
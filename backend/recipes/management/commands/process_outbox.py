@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.outbox import process_batch, purge_processed
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает события outbox пачками и передаёт их обработчикам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help='Количество событий в одной пачке'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать накопившиеся события и завершиться'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда новых событий нет'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            taken = process_batch(options['batch_size'])
+            total += taken
+            if taken:
+                continue
+            purged = purge_processed()
+            if options['once']:
+                break
+            if total or purged:
+                self.stdout.write(
+                    f'Обработано событий: {total}, удалено старых: {purged}.'
+                )
+                total = 0
+            time.sleep(options['sleep'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано событий: {total}.')
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:01
+
+import django.core.validators
+from django.db import migrations, models
+
+UNIT_CONVERSIONS = (
+    ('кг', 'г', 1000),
+    ('мг', 'г', 0.001),
+    ('л', 'мл', 1000),
+    ('шт', 'шт.', 1),
+)
+
+
+def add_unit_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model('recipes', 'UnitConversion')
+    UnitConversion.objects.bulk_create([
+        UnitConversion(unit=unit, base_unit=base_unit, factor=factor)
+        for unit, base_unit, factor in UNIT_CONVERSIONS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_recipe_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(max_length=64, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(max_length=64, verbose_name='Базовая единица')),
+                ('factor', models.FloatField(validators=[django.core.validators.MinValueValidator(0)], verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Перевод единиц измерения',
+                'verbose_name_plural': 'Переводы единиц измерения',
+                'ordering': ('unit',),
+            },
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='servings',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Количество порций'),
+        ),
+        migrations.RunPython(
+            add_unit_conversions, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_unitconversion_cart_servings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeNeighborsBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('favorite_watermark', models.BigIntegerField(default=0, verbose_name='Последнее обработанное избранное')),
+                ('cart_watermark', models.BigIntegerField(default=0, verbose_name='Последняя обработанная корзина')),
+                ('built_at', models.DateTimeField(auto_now=True, verbose_name='Время построения')),
+            ],
+            options={
+                'verbose_name': 'Построение похожих рецептов',
+                'verbose_name_plural': 'Построения похожих рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='recipes.recipe', verbose_name='Похожий рецепт')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'Похожие рецепты',
+                'ordering': ('recipe', '-score'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipeneighbor',
+            index=models.Index(fields=['recipe', '-score'], name='recipe_neighbor_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeneighbor',
+            constraint=models.UniqueConstraint(fields=('recipe', 'neighbor'), name='unique_recipe_neighbor'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:11
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=64, verbose_name='Событие')),
+                ('payload', models.JSONField(verbose_name='Данные')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно для обработки')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток обработки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+            ],
+            options={
+                'verbose_name': 'Событие outbox',
+                'verbose_name_plural': 'События outbox',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['available_at', 'id'], name='outbox_pending_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import connections, models
 from django.db.models.functions import Length
+from django.db.models.sql import InsertQuery
 from django.contrib.auth.models import AbstractUser
 from django.db.models import (
     CASCADE,
@@ -7,6 +8,7 @@ from django.db.models import (
     CharField,
     CheckConstraint,
     EmailField,
+    FloatField,
     ForeignKey,
     ImageField,
     ManyToManyField,
@@ -16,6 +18,7 @@ from django.db.models import (
     UniqueConstraint,
 )
 from django.conf import settings
+from django.utils import timezone
 from django.core.validators import (
     MinValueValidator,
     RegexValidator
@@ -24,10 +27,31 @@ from django.core.validators import (
 MAX_LEN_RECIPES_TEXTFIELD = 2000
 MIN_COOKING_TIME = 1
 MIN_AMOUNT_INGREDIENTS = 1
+MIN_SERVINGS = 1
 
 CharField.register_lookup(Length)
 
 
+class RelationQuerySet(models.QuerySet):
+    def create_if_absent(self, **values):
+        """
+        Single INSERT ... ON CONFLICT DO NOTHING, so concurrent duplicates
+        do not fail on the unique constraint. Returns whether the row
+        was inserted. Model signals are not sent.
+        """
+        self._for_write = True
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if not isinstance(field, models.AutoField)
+        ]
+        query = InsertQuery(self.model, ignore_conflicts=True)
+        query.insert_values(fields, [self.model(**values)])
+        with connections[self.db].cursor() as cursor:
+            for statement, params in query.get_compiler(self.db).as_sql():
+                cursor.execute(statement, params)
+            return cursor.rowcount > 0
+
+
 class User(AbstractUser):
     username = CharField(
         max_length=150,
@@ -83,6 +107,8 @@ class Subscription(models.Model):
         on_delete=CASCADE,
     )
 
+    objects = RelationQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.subscriber} → {self.author}"
 
@@ -125,6 +151,30 @@ class Ingredient(models.Model):
         return f"{self.name} ({self.measurement_unit})"
 
 
+class UnitConversion(models.Model):
+    unit = CharField(
+        verbose_name="Единица измерения",
+        max_length=64,
+        unique=True,
+    )
+    base_unit = CharField(
+        verbose_name="Базовая единица",
+        max_length=64,
+    )
+    factor = FloatField(
+        verbose_name="Множитель",
+        validators=[MinValueValidator(0)],
+    )
+
+    class Meta:
+        verbose_name = "Перевод единиц измерения"
+        verbose_name_plural = "Переводы единиц измерения"
+        ordering = ("unit",)
+
+    def __str__(self) -> str:
+        return f"1 {self.unit} = {self.factor:g} {self.base_unit}"
+
+
 class Recipe(models.Model):
     name = CharField(
         verbose_name="Название блюда",
@@ -168,10 +218,17 @@ class Recipe(models.Model):
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        ordering = ("-id",)
         constraints = (
             UniqueConstraint(fields=("name", "author"),
                              name="unique_recipe_per_author"),
         )
+        indexes = (
+            models.Index(
+                fields=("author", "-id"),
+                name="recipe_author_id_idx"
+            ),
+        )
 
     def __str__(self) -> str:
         return self.name
@@ -235,6 +292,8 @@ class UserRecipeRelation(models.Model):
         related_name="%(class)ss",
     )
 
+    objects = RelationQuerySet.as_manager()
+
     class Meta:
         abstract = True
         constraints = [
@@ -243,6 +302,13 @@ class UserRecipeRelation(models.Model):
                 name="unique_%(class)s_per_user",
             ),
         ]
+        # The unique constraint leads with recipe, lookups lead with user.
+        indexes = [
+            models.Index(
+                fields=("user", "recipe"),
+                name="%(class)s_user_recipe_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -258,6 +324,115 @@ class Favorite(UserRecipeRelation):
 
 
 class Cart(UserRecipeRelation):
+    servings = PositiveSmallIntegerField(
+        verbose_name="Количество порций",
+        default=MIN_SERVINGS,
+        validators=[MinValueValidator(MIN_SERVINGS)],
+    )
+
     class Meta(UserRecipeRelation.Meta):
         verbose_name = "Рецепт в списке покупок"
         verbose_name_plural = "Рецепты в списке покупок"
+
+
+class RecipeNeighbor(models.Model):
+    recipe = ForeignKey(
+        verbose_name="Рецепт",
+        related_name="neighbors",
+        to=Recipe,
+        on_delete=CASCADE,
+    )
+    neighbor = ForeignKey(
+        verbose_name="Похожий рецепт",
+        related_name="neighbor_of",
+        to=Recipe,
+        on_delete=CASCADE,
+    )
+    score = FloatField(verbose_name="Сходство")
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        ordering = ("recipe", "-score")
+        constraints = (
+            UniqueConstraint(
+                fields=("recipe", "neighbor"),
+                name="unique_recipe_neighbor"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("recipe", "-score"),
+                name="recipe_neighbor_score_idx"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.recipe} ~ {self.neighbor} ({self.score:.3f})"
+
+
+class RecipeNeighborsBuild(models.Model):
+    favorite_watermark = models.BigIntegerField(
+        verbose_name="Последнее обработанное избранное",
+        default=0,
+    )
+    cart_watermark = models.BigIntegerField(
+        verbose_name="Последняя обработанная корзина",
+        default=0,
+    )
+    built_at = models.DateTimeField(
+        verbose_name="Время построения",
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = "Построение похожих рецептов"
+        verbose_name_plural = "Построения похожих рецептов"
+
+    def __str__(self) -> str:
+        return f"{self.built_at:%d.%m.%Y %H:%M}"
+
+
+class OutboxEvent(models.Model):
+    topic = CharField(
+        verbose_name="Событие",
+        max_length=64,
+    )
+    payload = models.JSONField(verbose_name="Данные")
+    created_at = models.DateTimeField(
+        verbose_name="Создано",
+        auto_now_add=True,
+    )
+    available_at = models.DateTimeField(
+        verbose_name="Доступно для обработки",
+        default=timezone.now,
+    )
+    attempts = PositiveSmallIntegerField(
+        verbose_name="Попыток обработки",
+        default=0,
+    )
+    last_error = TextField(
+        verbose_name="Последняя ошибка",
+        blank=True,
+    )
+    processed_at = models.DateTimeField(
+        verbose_name="Обработано",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = "Событие outbox"
+        verbose_name_plural = "События outbox"
+        ordering = ("id",)
+        indexes = (
+            # The worker only reads pending events.
+            models.Index(
+                fields=("available_at", "id"),
+                condition=Q(processed_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.topic} #{self.pk}"
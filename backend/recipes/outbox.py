@@ -0,0 +1,119 @@
+import logging
+from datetime import timedelta
+from fnmatch import fnmatch
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import similarity
+from .models import Cart, Favorite, OutboxEvent, Recipe, Subscription
+
+logger = logging.getLogger(__name__)
+
+# Fields copied into the event payload.
+PAYLOAD_FIELDS = {
+    Recipe: ('id', 'author_id'),
+    Favorite: ('id', 'user_id', 'recipe_id'),
+    Cart: ('id', 'user_id', 'recipe_id', 'servings'),
+    Subscription: ('id', 'subscriber_id', 'author_id'),
+}
+
+
+def topic(model, change):
+    return f'{model._meta.model_name}.{change}'
+
+
+def payload(instance):
+    return {
+        field: getattr(instance, field)
+        for field in PAYLOAD_FIELDS[type(instance)]
+    }
+
+
+def publish(event_topic, data):
+    """Store the event in the caller's transaction."""
+    OutboxEvent.objects.create(topic=event_topic, payload=data)
+
+
+def publish_many(event_topic, items):
+    OutboxEvent.objects.bulk_create(
+        OutboxEvent(topic=event_topic, payload=data) for data in items
+    )
+
+
+@lru_cache(maxsize=None)
+def handlers_for(event_topic):
+    return tuple(
+        import_string(path)
+        for pattern, paths in settings.OUTBOX_HANDLERS.items()
+        if fnmatch(event_topic, pattern)
+        for path in paths
+    )
+
+
+def process_batch(batch_size):
+    """
+    Hand the next pending events to their handlers, grouped by topic.
+    An event is marked processed only after all its handlers succeeded,
+    failed groups are retried later with a backoff (at-least-once).
+    Returns the number of events taken.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                processed_at__isnull=True,
+                available_at__lte=now,
+                attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+            )
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        by_topic = {}
+        for event in events:
+            by_topic.setdefault(event.topic, []).append(event)
+
+        for event_topic, topic_events in by_topic.items():
+            try:
+                with transaction.atomic():
+                    for handler in handlers_for(event_topic):
+                        handler(topic_events)
+            except Exception as error:
+                logger.exception('Outbox handler failed for %s', event_topic)
+                # Events of a group can have different attempt counts.
+                retries = {}
+                for event in topic_events:
+                    retries.setdefault(event.attempts + 1, []).append(
+                        event.id
+                    )
+                for attempts, retry_ids in retries.items():
+                    OutboxEvent.objects.filter(id__in=retry_ids).update(
+                        attempts=attempts,
+                        last_error=repr(error),
+                        available_at=now + timedelta(
+                            seconds=settings.OUTBOX_RETRY_DELAY
+                            * 2 ** attempts
+                        ),
+                    )
+            else:
+                OutboxEvent.objects.filter(
+                    id__in=[event.id for event in topic_events]
+                ).update(processed_at=now)
+    return len(events)
+
+
+def purge_processed():
+    return OutboxEvent.objects.filter(
+        processed_at__lt=timezone.now() - timedelta(
+            days=settings.OUTBOX_RETENTION_DAYS
+        )
+    ).delete()[0]
+
+
+def update_recipe_neighbors(events):
+    """Incremental similar-recipes build after new favorites/cart items."""
+    similarity.build(settings.RECIPE_NEIGHBORS_TOP_K)
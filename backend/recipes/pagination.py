@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """
+    Planner row estimate for an unfiltered queryset on PostgreSQL, or
+    ``None`` when an exact ``COUNT(*)`` should be used instead.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    if (
+        connection.vendor != 'postgresql'
+        or query.where
+        or query.distinct
+        or query.is_sliced
+    ):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < settings.ESTIMATED_COUNT_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        return super().count if estimate is None else estimate
@@ -0,0 +1,116 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Trim
+
+from .models import AmountIngredient, Cart, UnitConversion
+
+CART_VERSION_KEY = 'shopping_list:cart_version:{user_id}'
+RECIPES_VERSION_KEY = 'shopping_list:recipes_version'
+SHOPPING_LIST_KEY = 'shopping_list:{user_id}:{cart_version}:{recipes_version}'
+
+
+def _get_version(key):
+    # Random versions, so an evicted counter can't resurrect a stale list.
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cart_version(user_id):
+    cache.set(CART_VERSION_KEY.format(user_id=user_id), uuid4().hex, None)
+
+
+def bump_recipes_version():
+    cache.set(RECIPES_VERSION_KEY, uuid4().hex, None)
+
+
+def normalize_name(name):
+    """
+    Product key of an ingredient name: case, ё and extra spaces are
+    ignored. Done in Python, SQLite's lower() only folds ASCII letters.
+    """
+    return ' '.join(name.split()).casefold().replace('ё', 'е')
+
+
+def cart_amounts(user):
+    """
+    Sum the cart ingredients in one query: units are converted to their
+    base unit and amounts are multiplied by the servings of every cart
+    item, grouped by ingredient name and base unit.
+    """
+    conversions = UnitConversion.objects.filter(
+        unit=OuterRef('ingredient__measurement_unit')
+    )
+    return (
+        AmountIngredient.objects
+        .filter(recipe__carts__user=user)
+        .annotate(
+            name=Trim('ingredient__name'),
+            unit=Coalesce(
+                Subquery(conversions.values('base_unit')[:1]),
+                F('ingredient__measurement_unit')
+            ),
+        )
+        .values('name', 'unit')
+        .annotate(
+            total_amount=Sum(
+                F('amount')
+                * F('recipe__carts__servings')
+                * Coalesce(
+                    Subquery(conversions.values('factor')[:1]), Value(1.0)
+                ),
+                output_field=FloatField()
+            ),
+        )
+        .order_by()
+    )
+
+
+def aggregate_ingredients(user):
+    """``cart_amounts`` merged by the normalized product name."""
+    products = {}
+    for amount in cart_amounts(user):
+        key = (normalize_name(amount['name']), amount['unit'])
+        if key in products:
+            product = products[key]
+            product['name'] = min(product['name'], amount['name'])
+            product['total_amount'] += amount['total_amount']
+        else:
+            products[key] = dict(amount)
+    return [products[key] for key in sorted(products)]
+
+
+def cart_recipes(user):
+    return (
+        Cart.objects
+        .filter(user=user)
+        .values('recipe__name', 'recipe__author__username', 'servings')
+        .order_by('recipe__name')
+    )
+
+
+def shopping_list_key(user):
+    """Changes whenever the user's shopping list may have changed."""
+    return SHOPPING_LIST_KEY.format(
+        user_id=user.id,
+        cart_version=_get_version(CART_VERSION_KEY.format(user_id=user.id)),
+        recipes_version=_get_version(RECIPES_VERSION_KEY),
+    )
+
+
+def get_shopping_list(user):
+    """Aggregated ingredients and recipes, cached per cart version."""
+    key = shopping_list_key(user)
+    shopping_list = cache.get(key)
+    if shopping_list is None:
+        shopping_list = (
+            list(aggregate_ingredients(user)),
+            list(cart_recipes(user)),
+        )
+        cache.set(key, shopping_list, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+    return shopping_list
@@ -0,0 +1,103 @@
+import string
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.conf import settings
+
+from .models import Recipe
+
+ALPHABET = string.digits + string.ascii_letters
+# Codes start with a letter, all-digit codes are the decimal pks of the
+# links shared before the base62 codes.
+LEADING = string.ascii_letters
+BASE = len(ALPHABET)
+INDEX = {char: i for i, char in enumerate(ALPHABET)}
+MAX_PK = 2 ** 63 - 1
+
+
+def encode(pk):
+    if pk < 0:
+        raise ValueError('pk must be non-negative')
+    pk, rest = divmod(pk, len(LEADING))
+    code = []
+    while pk:
+        pk, digit = divmod(pk, BASE)
+        code.append(ALPHABET[digit])
+    return LEADING[rest] + ''.join(reversed(code))
+
+
+def decode(code):
+    """Return the recipe pk for ``code`` or ``None`` if it is malformed."""
+    if not code or len(code) > 19:
+        return None
+    if code.isascii() and code.isdigit():
+        pk = int(code)
+        return pk if pk <= MAX_PK else None
+    if code[0] not in LEADING:
+        return None
+    pk = 0
+    for char in code[1:]:
+        if char not in INDEX:
+            return None
+        pk = pk * BASE + INDEX[char]
+    pk = pk * len(LEADING) + LEADING.index(code[0])
+    # Larger values overflow the bigint primary key lookup.
+    return pk if pk <= MAX_PK else None
+
+
+class ShortLinkResolver:
+    """
+    Bounded LRU of recipe existence. Missing ids are cached too, but only
+    for ``negative_ttl`` seconds since they may be created later.
+    """
+
+    def __init__(self, max_size, ttl, negative_ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        """Cached existence of ``pk``: ``True``, ``False`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is None:
+                return None
+            exists, expires_at = entry
+            if expires_at < monotonic():
+                del self._entries[pk]
+                return None
+            self._entries.move_to_end(pk)
+            return exists
+
+    def set(self, pk, exists):
+        ttl = self.ttl if exists else self.negative_ttl
+        with self._lock:
+            self._entries[pk] = (exists, monotonic() + ttl)
+            self._entries.move_to_end(pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def exists(self, pk):
+        exists = self.get(pk)
+        if exists is None:
+            exists = Recipe.objects.filter(pk=pk).exists()
+            self.set(pk, exists)
+        return exists
+
+
+resolver = ShortLinkResolver(
+    max_size=settings.SHORT_LINK_CACHE_SIZE,
+    ttl=settings.SHORT_LINK_CACHE_TTL,
+    negative_ttl=settings.SHORT_LINK_NEGATIVE_CACHE_TTL,
+)
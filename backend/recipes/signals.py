@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import outbox
+from .bloom import user_identifiers
+from .ingredient_catalogue import bump_catalogue_version
+from .ingredient_index import index as ingredient_index
+from .models import (
+    AmountIngredient,
+    Cart,
+    Favorite,
+    Ingredient,
+    Recipe,
+    Subscription,
+    UnitConversion,
+    User,
+)
+from .short_links import resolver
+from .shopping_list import bump_cart_version, bump_recipes_version
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_short_link(sender, instance, **kwargs):
+    resolver.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart_shopping_list(sender, instance, **kwargs):
+    bump_cart_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=UnitConversion)
+@receiver(post_delete, sender=UnitConversion)
+def invalidate_shopping_lists(sender, **kwargs):
+    bump_recipes_version()
+
+
+@receiver(post_save, sender=AmountIngredient)
+@receiver(post_delete, sender=AmountIngredient)
+def refresh_ingredient_index(sender, instance, **kwargs):
+    ingredient_index.schedule_refresh(instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+@receiver(post_save, sender=Subscription)
+def publish_saved(sender, instance, created, raw=False, **kwargs):
+    # Fixture loads are not domain events.
+    if raw:
+        return
+    outbox.publish(
+        outbox.topic(sender, 'created' if created else 'updated'),
+        outbox.payload(instance)
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+@receiver(post_delete, sender=Subscription)
+def publish_deleted(sender, instance, **kwargs):
+    outbox.publish(outbox.topic(sender, 'deleted'), outbox.payload(instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_catalogue(sender, **kwargs):
+    # After commit, so a rebuild can't cache the old rows as new version.
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=User)
+def remember_user_identifiers(sender, instance, **kwargs):
+    # Renames too, stale values only cost an extra query.
+    user_identifiers.add(instance.username, instance.email)
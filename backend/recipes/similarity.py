@@ -0,0 +1,161 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import groupby
+from math import sqrt
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .models import (
+    Cart,
+    Favorite,
+    RecipeNeighbor,
+    RecipeNeighborsBuild,
+)
+
+
+def interactions(chunk_size, users=None):
+    """
+    Stream ``(user_id, recipe_ids)`` pairs, merging favorites and carts
+    ordered by user so only one user's recipes are held in memory.
+    ``users`` is an optional filter of the streamed rows.
+    """
+    streams = [
+        model.objects
+        .filter(users or Q())
+        .order_by('user_id', 'recipe_id')
+        .values_list('user_id', 'recipe_id')
+        .iterator(chunk_size=chunk_size)
+        for model in (Favorite, Cart)
+    ]
+    rows = heapq.merge(*streams, key=itemgetter(0))
+    for user_id, user_rows in groupby(rows, key=itemgetter(0)):
+        yield user_id, {recipe_id for _, recipe_id in user_rows}
+
+
+def interacted_with(recipe_ids):
+    """Filter of the rows of users who have any of ``recipe_ids``."""
+    return (
+        Q(user__in=Favorite.objects
+          .filter(recipe_id__in=recipe_ids)
+          .values('user'))
+        | Q(user__in=Cart.objects
+            .filter(recipe_id__in=recipe_ids)
+            .values('user'))
+    )
+
+
+def popularity(recipe_ids, chunk_size):
+    """Number of distinct users per recipe of ``recipe_ids``."""
+    users = Counter()
+    recipe_ids = sorted(recipe_ids)
+    for start in range(0, len(recipe_ids), chunk_size):
+        chunk = recipe_ids[start:start + chunk_size]
+        streams = [
+            model.objects
+            .filter(recipe_id__in=chunk)
+            .order_by('recipe_id', 'user_id')
+            .values_list('recipe_id', 'user_id')
+            .iterator(chunk_size=chunk_size)
+            for model in (Favorite, Cart)
+        ]
+        rows = heapq.merge(*streams, key=itemgetter(0))
+        for recipe_id, recipe_rows in groupby(rows, key=itemgetter(0)):
+            users[recipe_id] = len({user_id for _, user_id in recipe_rows})
+    return users
+
+
+def cooccurrence(recipe_ids=None, chunk_size=2000):
+    """
+    Sparse item-item co-occurrence for ``recipe_ids`` (every recipe when
+    ``None``) and the number of users per recipe. Only the users of
+    ``recipe_ids`` are streamed, the others add no pairs for them.
+    """
+    pairs = defaultdict(Counter)
+    users = Counter()
+    streamed = None if recipe_ids is None else interacted_with(recipe_ids)
+    for _, recipes in interactions(chunk_size, streamed):
+        users.update(recipes)
+        sources = recipes if recipe_ids is None else recipes & recipe_ids
+        for recipe in sources:
+            pairs[recipe].update(recipes)
+            pairs[recipe][recipe] -= 1
+    if streamed is not None:
+        # The streamed users undercount the neighbors' popularity.
+        users = popularity(set(users), chunk_size)
+    return pairs, users
+
+
+def top_neighbors(pairs, users, top_k):
+    for recipe, counts in pairs.items():
+        scored = (
+            (count / sqrt(users[recipe] * users[neighbor]), neighbor)
+            for neighbor, count in counts.items()
+            if count > 0
+        )
+        yield recipe, heapq.nlargest(top_k, scored)
+
+
+def affected_recipes(favorite_watermark, cart_watermark):
+    """Recipes of the users who interacted after the watermarks."""
+    new_users = (
+        Q(user__in=Favorite.objects
+          .filter(id__gt=favorite_watermark)
+          .values('user'))
+        | Q(user__in=Cart.objects
+            .filter(id__gt=cart_watermark)
+            .values('user'))
+    )
+    recipes = set()
+    for model in (Favorite, Cart):
+        recipes.update(
+            model.objects.filter(new_users).values_list('recipe_id', flat=True)
+        )
+    return recipes
+
+
+@transaction.atomic
+def store_neighbors(neighbors, recipe_ids=None):
+    stale = RecipeNeighbor.objects.all()
+    if recipe_ids is not None:
+        stale = stale.filter(recipe_id__in=recipe_ids)
+    stale.delete()
+    RecipeNeighbor.objects.bulk_create(
+        (
+            RecipeNeighbor(
+                recipe_id=recipe, neighbor_id=neighbor, score=score
+            )
+            for recipe, top in neighbors
+            for score, neighbor in top
+        ),
+        batch_size=1000,
+    )
+
+
+def build(top_k, full=False, chunk_size=2000):
+    """
+    Rebuild the top-k neighbors, only for recipes touched since the last
+    build unless ``full``. Returns the number of recomputed recipes.
+    """
+    state, _ = RecipeNeighborsBuild.objects.get_or_create(pk=1)
+    favorite_watermark = (
+        Favorite.objects.aggregate(last=Max('id'))['last'] or 0
+    )
+    cart_watermark = Cart.objects.aggregate(last=Max('id'))['last'] or 0
+
+    recipe_ids = None
+    if not full:
+        recipe_ids = affected_recipes(
+            state.favorite_watermark, state.cart_watermark
+        )
+        if not recipe_ids:
+            return 0
+
+    pairs, users = cooccurrence(recipe_ids, chunk_size)
+    with transaction.atomic():
+        store_neighbors(top_neighbors(pairs, users, top_k), recipe_ids)
+        state.favorite_watermark = favorite_watermark
+        state.cart_watermark = cart_watermark
+        state.save()
+    return len(pairs) if recipe_ids is None else len(recipe_ids)
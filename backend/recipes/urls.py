@@ -3,8 +3,13 @@ from . import views
 
 urlpatterns = [
     path(
-        's/<int:pk>/',
+        's/<str:code>/',
         views.recipe_short_link_redirect,
         name='recipe-short-link'
     ),
+    path(
+        'media-resize/<int:width>x<int:height>/<path:path>',
+        views.resized_image,
+        name='image-variant'
+    ),
 ]
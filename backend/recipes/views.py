@@ -1,9 +1,34 @@
-from django.http import Http404
-from django.shortcuts import redirect
-from .models import Recipe
+from django.conf import settings
+from django.http import Http404, HttpResponsePermanentRedirect
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
 
+from foodgram.db_connections import database_sync_to_async
+from foodgram.file_delivery import deliver_file
+from .image_variants import VariantError, get_variant
+from .short_links import decode, resolver
 
-def recipe_short_link_redirect(request, pk):
-    if not Recipe.objects.filter(pk=pk).exists():
+
+async def recipe_short_link_redirect(request, code):
+    pk = decode(code)
+    exists = database_sync_to_async(resolver.exists)
+    if pk is None or not await exists(pk):
         raise Http404("Recipe not found")
-    return redirect(f"/recipes/{pk}/")
+    response = HttpResponsePermanentRedirect(f"/recipes/{pk}/")
+    patch_cache_control(
+        response, public=True, max_age=settings.SHORT_LINK_CACHE_TTL
+    )
+    return response
+
+
+@require_safe
+def resized_image(request, width, height, path):
+    try:
+        variant = get_variant(path, width, height)
+    except VariantError:
+        raise Http404("Image not found")
+    response = deliver_file(variant, content_type='image/webp')
+    patch_cache_control(
+        response, public=True, max_age=settings.IMAGE_VARIANTS_MAX_AGE
+    )
+    return response
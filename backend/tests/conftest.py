@@ -0,0 +1,87 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import AmountIngredient, Ingredient, Recipe, User
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    # Versions, counts and pins live in the cache, fresh for every test.
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # Uploads and generated files never land in the project tree.
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.PROTECTED_MEDIA_ROOT = str(tmp_path / 'protected')
+    settings.IMAGE_VARIANTS_ROOT = str(tmp_path / 'media' / 'variants')
+
+
+@pytest.fixture(autouse=True)
+def inline_password_hashing(settings):
+    # Hashing in the test process, test_hashers covers the process pool.
+    settings.PASSWORD_HASHING_POOL_SIZE = 0
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        first_name=username,
+        last_name=username,
+        password='Very$ecret123',
+    )
+
+
+@pytest.fixture
+def user(db):
+    return make_user('cook')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    return client
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=f'Продукт {number}',
+                                  measurement_unit='г')
+        for number in range(10)
+    ]
+
+
+@pytest.fixture
+def make_recipes(ingredients):
+    def make_recipes(count, author=None):
+        author = author or make_user(f'author{Recipe.objects.count()}')
+        recipes = []
+        for _ in range(count):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {Recipe.objects.count()}',
+                text='Текст',
+                cooking_time=10,
+            )
+            AmountIngredient.objects.bulk_create(
+                AmountIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=100)
+                for ingredient in ingredients[:3]
+            )
+            recipes.append(recipe)
+        return recipes
+    return make_recipes
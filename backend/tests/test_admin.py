@@ -0,0 +1,83 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, Recipe, Subscription, User
+from recipes.pagination import EstimatedCountPaginator, estimated_count
+from .conftest import make_user
+
+
+@pytest.fixture
+def admin_client(db):
+    client = Client()
+    client.force_login(User.objects.create_superuser(
+        username='admin', email='admin@example.com', password='Admin$123'
+    ))
+    return client
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context)
+
+
+def populate(make_recipes, count):
+    for _ in range(count):
+        recipe, = make_recipes(1)
+        fan = make_user(f'fan{User.objects.count()}')
+        Favorite.objects.create(user=fan, recipe=recipe)
+        Subscription.objects.create(subscriber=fan, author=recipe.author)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', [
+    '/admin/recipes/user/',
+    '/admin/recipes/recipe/',
+    '/admin/recipes/favorite/',
+    '/admin/recipes/ingredient/',
+])
+def test_changelist_queries_do_not_grow_with_rows(
+    admin_client, make_recipes, url
+):
+    populate(make_recipes, 2)
+    few = count_queries(admin_client, url)
+    populate(make_recipes, 6)
+    assert count_queries(admin_client, url) == few
+
+
+@pytest.mark.django_db
+def test_changelist_shows_the_annotated_counts(admin_client, make_recipes):
+    populate(make_recipes, 1)
+    recipe = Recipe.objects.get()
+    response = admin_client.get('/admin/recipes/user/')
+    user, = (
+        user for user in response.context['cl'].result_list
+        if user == recipe.author
+    )
+    assert (user.recipes_count, user.subscribers_count) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_paginator_counts_exactly_without_an_estimate(make_recipes):
+    make_recipes(3)
+    paginator = EstimatedCountPaginator(Recipe.objects.all(), 2)
+    with CaptureQueriesContext(connection) as context:
+        assert paginator.count == 3
+    assert 'COUNT(' in context[0]['sql']
+
+
+@pytest.mark.django_db
+def test_paginator_takes_the_planner_estimate_of_large_tables(settings):
+    settings.ESTIMATED_COUNT_THRESHOLD = 100
+    cursor = mock.MagicMock()
+    cursor.__enter__.return_value.fetchone.return_value = (1500.0,)
+    with mock.patch.object(connection, 'vendor', 'postgresql'), \
+            mock.patch.object(connection, 'cursor', return_value=cursor):
+        assert EstimatedCountPaginator(Recipe.objects.all(), 2).count == 1500
+        # Filtered querysets have no planner estimate.
+        assert estimated_count(Recipe.objects.filter(cooking_time=1)) is None
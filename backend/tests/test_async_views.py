@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from rest_framework.authtoken.models import Token
+
+from api import async_views
+from recipes.models import Recipe, Subscription
+
+
+@pytest.fixture
+def call(user):
+    # The views are called directly, api.urls mounts them only under ASGI.
+    token = Token.objects.get_or_create(user=user)[0]
+
+    def call(view, method, path, data=None, **kwargs):
+        request = getattr(RequestFactory(), method)(
+            path, data, HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        return async_to_sync(view)(request, **kwargs)
+    return call
+
+
+@pytest.mark.django_db
+def test_recipe_list_matches_the_viewset(client, call, user, make_recipes):
+    recipes = make_recipes(3)
+    make_recipes(2)
+    Subscription.objects.create(subscriber=user, author=recipes[0].author)
+    params = {'limit': 4, 'offset': 1}
+    response = call(async_views.recipe_list, 'get', '/api/recipes/', params)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/json'
+    assert b'"is_subscribed":true' in response.content
+    assert response.content == client.get('/api/recipes/', params).content
+
+
+@pytest.mark.django_db
+def test_recipe_detail_matches_the_viewset(client, call, make_recipes):
+    recipe, = make_recipes(1)
+    path = f'/api/recipes/{recipe.pk}/'
+    response = call(async_views.recipe_detail, 'get', path, pk=recipe.pk)
+    assert response.content == client.get(path).content
+
+
+@pytest.mark.django_db
+def test_ingredient_search_matches_the_viewset(client, call, ingredients):
+    params = {'name': 'Продукт 1'}
+    response = call(
+        async_views.ingredient_list, 'get', '/api/ingredients/', params
+    )
+    assert response.content == client.get('/api/ingredients/', params).content
+
+
+@pytest.mark.django_db
+def test_missing_recipe_is_not_found(call):
+    response = call(async_views.recipe_detail, 'get', '/api/recipes/0/', pk=0)
+    assert response.status_code == 404
+    assert set(json.loads(response.content)) == {'detail'}
+
+
+@pytest.mark.django_db
+def test_writes_fall_back_to_the_viewset(call, make_recipes, user):
+    recipe, = make_recipes(1, author=user)
+    path = f'/api/recipes/{recipe.pk}/'
+    response = call(async_views.recipe_detail, 'delete', path, pk=recipe.pk)
+    assert response.status_code == 204
+    assert not Recipe.objects.filter(pk=recipe.pk).exists()
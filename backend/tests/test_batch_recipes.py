@@ -0,0 +1,51 @@
+import pytest
+
+from .test_recipe_queries import count_queries
+
+
+@pytest.mark.django_db
+def test_batch_keeps_request_order_and_reports_missing(client, make_recipes):
+    first, second, third = make_recipes(3)
+    response = client.get(
+        '/api/recipes/batch/',
+        {'ids': f'{third.pk},{first.pk},0,{third.pk}'}
+    )
+    assert response.status_code == 200, response.content
+    data = response.json()
+    assert [recipe['id'] for recipe in data['results']] == [
+        third.pk, first.pk
+    ]
+    assert data['missing'] == [0]
+    assert data['results'][0] == client.get(
+        f'/api/recipes/{third.pk}/'
+    ).json()
+
+
+@pytest.mark.django_db
+def test_batch_queries_do_not_grow_with_ids(client, make_recipes):
+    recipes = make_recipes(10)
+
+    def batch(recipes):
+        ids = ','.join(str(recipe.pk) for recipe in recipes)
+        return lambda: client.get('/api/recipes/batch/', {'ids': ids})
+
+    assert count_queries(batch(recipes)) == count_queries(batch(recipes[:2]))
+
+
+@pytest.mark.django_db
+def test_batch_applies_sparse_fields(client, make_recipes):
+    recipe, = make_recipes(1)
+    data = client.get(
+        '/api/recipes/batch/', {'ids': recipe.pk, 'fields': 'id,name'}
+    ).json()
+    assert data['results'] == [{'id': recipe.pk, 'name': recipe.name}]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ids', [
+    '', '1,a', '1,²', str(2 ** 63), ','.join(['1'] * 101),
+])
+def test_batch_rejects_bad_ids(client, ids):
+    response = client.get('/api/recipes/batch/', {'ids': ids})
+    assert response.status_code == 400
+    assert 'ids' in response.json()
@@ -0,0 +1,55 @@
+from unittest import mock
+
+import pytest
+
+from recipes.models import Favorite, OutboxEvent, RelationQuerySet
+
+
+def created_events(recipe):
+    return [
+        event for event in OutboxEvent.objects.filter(
+            topic='favorite.created'
+        )
+        if event.payload['recipe_id'] == recipe.pk
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_favorite_statuses(client, user, make_recipes):
+    new, old = make_recipes(2)
+    Favorite.objects.create(user=user, recipe=old)
+    response = client.post(
+        '/api/recipes/favorite/',
+        {'recipes': [new.pk, old.pk, 10 ** 6]},
+        format='json'
+    )
+    assert response.json() == [
+        {'id': new.pk, 'status': 'created'},
+        {'id': old.pk, 'status': 'exists'},
+        {'id': 10 ** 6, 'status': 'not_found'},
+    ]
+    assert len(created_events(new)) == 1
+
+
+@pytest.mark.django_db
+def test_rows_inserted_concurrently_are_not_reported_created(
+    client, user, make_recipes
+):
+    raced, = make_recipes(1)
+    create_if_absent = RelationQuerySet.create_if_absent
+
+    def concurrent_insert_wins(queryset, **values):
+        # Lands after the existence check, before this request's insert.
+        Favorite.objects.create(user=user, recipe=raced)
+        return create_if_absent(queryset, **values)
+
+    with mock.patch.object(
+        RelationQuerySet, 'create_if_absent', concurrent_insert_wins
+    ):
+        response = client.post(
+            '/api/recipes/favorite/', {'recipes': [raced.pk]}, format='json'
+        )
+    assert response.json() == [{'id': raced.pk, 'status': 'exists'}]
+    # Only the winner's own event.
+    assert len(created_events(raced)) == 1
+    assert Favorite.objects.filter(user=user, recipe=raced).count() == 1
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+OTHER_PROCESS_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'other-process',
+    }
+}
+
+
+@pytest.mark.django_db
+def test_ingredients_loaded_elsewhere_reach_the_catalogue(
+    client, ingredients, settings, tmp_path
+):
+    settings.INGREDIENT_CATALOGUE_ROWS_TIMEOUT = 0
+    before = client.get('/api/ingredients/')
+    data = tmp_path / 'ingredients.json'
+    data.write_text(json.dumps(
+        [{'name': 'Новый продукт', 'measurement_unit': 'шт'}]
+    ))
+
+    # The command's bump only reaches its own cache.
+    with override_settings(CACHES=OTHER_PROCESS_CACHE):
+        call_command('load_ingredients_data', file=str(data))
+
+    after = client.get('/api/ingredients/')
+    assert after['ETag'] != before['ETag']
+    assert len(after.json()) == len(before.json()) + 1
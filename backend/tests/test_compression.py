@@ -0,0 +1,57 @@
+import asyncio
+import gzip
+import json
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from foodgram.compression import CompressionMiddleware
+
+BODY = json.dumps([{'name': f'Продукт {n}'} for n in range(100)]).encode()
+
+
+def json_response(request):
+    return HttpResponse(BODY, content_type='application/json')
+
+
+def gzip_request():
+    return RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+
+
+def test_compresses_with_gzip():
+    response = CompressionMiddleware(json_response)(gzip_request())
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == BODY
+
+
+def test_compresses_in_async_chain():
+    async def get_response(request):
+        return json_response(request)
+
+    middleware = CompressionMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(gzip_request())
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == BODY
+
+
+def test_streaming_response_is_compressed_chunk_by_chunk(settings):
+    settings.COMPRESSION_STREAM_FLUSH_SIZE = 1024
+    chunks = [BODY[start:start + 700] for start in range(0, len(BODY), 700)]
+
+    def streaming_response(request):
+        response = StreamingHttpResponse(
+            iter(chunks), content_type='application/json'
+        )
+        response['Content-Length'] = str(len(BODY))
+        return response
+
+    response = CompressionMiddleware(streaming_response)(gzip_request())
+    assert response['Content-Encoding'] == 'gzip'
+    assert not response.has_header('Content-Length')
+    assert 'Accept-Encoding' in response['Vary']
+    compressed = list(response.streaming_content)
+    # Flushed along the way, not buffered until the end.
+    assert len([chunk for chunk in compressed if chunk]) > 2
+    assert gzip.decompress(b''.join(compressed)) == BODY
@@ -0,0 +1,68 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+
+from foodgram.db_connections import DatabasePool
+
+
+def raw_connection():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return connection.connection
+
+
+@pytest.fixture
+def pool(transactional_db):
+    pool = DatabasePool(size=1, timeout=5)
+    yield pool
+    asyncio.run(pool.run(lambda: connection.close()))
+    pool.executor.shutdown()
+
+
+def run_twice(pool):
+    async def run():
+        return [await pool.run(raw_connection) for _ in range(2)]
+    return asyncio.run(run())
+
+
+def test_pool_reuses_connections_without_conn_max_age(pool, monkeypatch):
+    monkeypatch.setitem(connection.settings_dict, 'CONN_MAX_AGE', 0)
+    first, second = run_twice(pool)
+    assert first is second
+    assert pool.metrics()['checkouts'] == 2
+
+
+def test_pool_closes_connections_past_max_age(pool, settings):
+    settings.DB_POOL_CONN_MAX_AGE = -1
+    # The in-memory SQLite test database ignores real closes.
+    with mock.patch.object(
+        type(connections['default']), 'close'
+    ) as close:
+        run_twice(pool)
+    close.assert_called_once_with()
+
+
+@pytest.fixture
+def open_connection(db, monkeypatch):
+    raw_connection()
+    monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS', True)
+    with mock.patch.object(
+        type(connections['default']), 'is_usable', return_value=True
+    ) as is_usable:
+        yield is_usable
+
+
+def test_recently_used_connections_are_not_pinged(open_connection):
+    request_finished.send(sender=None)
+    request_started.send(sender=None)
+    open_connection.assert_not_called()
+
+
+def test_idle_connections_are_pinged(open_connection, settings):
+    request_finished.send(sender=None)
+    settings.DB_CONN_HEALTH_CHECK_IDLE = -1
+    request_started.send(sender=None)
+    open_connection.assert_called_once_with()
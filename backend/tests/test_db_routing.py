@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import override_settings
+
+from foodgram import db_routing
+from recipes.models import Recipe
+
+REPLICA = 'replica_1'
+
+
+@pytest.fixture
+def replica(transactional_db, tmp_path, settings):
+    """A second SQLite database as the only replica."""
+    connections.databases[REPLICA] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_ROUTERS = ['foodgram.db_routing.ReplicaRouter']
+    settings.MIDDLEWARE = [
+        *settings.MIDDLEWARE, 'foodgram.db_routing.ReplicaRoutingMiddleware'
+    ]
+    yield connections.databases[REPLICA]['NAME']
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+    db_routing._down_until.clear()
+
+
+def replicate(path):
+    primary = connections['default']
+    primary.ensure_connection()
+    target = sqlite3.connect(path)
+    primary.connection.backup(target)
+    target.close()
+
+
+def names(response):
+    assert response.status_code == 200, response.content
+    return {recipe['name'] for recipe in response.json()['results']}
+
+
+def test_reads_go_to_replica_until_client_writes(
+    replica, client, make_recipes
+):
+    replicated, = make_recipes(1)
+    replicate(replica)
+    not_replicated, = make_recipes(1)
+
+    assert names(client.get('/api/recipes/')) == {replicated.name}
+    response = client.post(f'/api/recipes/{replicated.pk}/favorite/')
+    assert response.status_code == 201
+    # Read-your-writes: pinned to the primary.
+    assert names(client.get('/api/recipes/')) == {
+        replicated.name, not_replicated.name
+    }
+
+
+def test_replica_errors_fall_back_to_primary(replica, client, make_recipes):
+    # The replica has no tables yet.
+    recipe, = make_recipes(1)
+
+    assert names(client.get('/api/recipes/')) == {recipe.name}
+    assert db_routing.healthy_replicas() == []
+    assert Recipe.objects.using('default').count() == 1
+
+
+DATABASE_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
+
+@override_settings(CACHES=DATABASE_CACHE)
+def test_database_cache_is_read_from_primary(replica):
+    call_command('createcachetable')
+    replicate(replica)
+    cache.set('version', 'new')
+
+    token = db_routing._read_alias.set(REPLICA)
+    try:
+        assert cache.get('version') == 'new'
+        assert router.db_for_read(Recipe) == REPLICA
+    finally:
+        db_routing._read_alias.reset(token)
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from recipes.models import Cart, Favorite, Recipe
+
+
+def explain(**options):
+    out = io.StringIO()
+    call_command('explain_queries', repeat=1, no_color=True, stdout=out,
+                 **options)
+    return {
+        line[:42].strip(): line[42:] for line in out.getvalue().splitlines()
+    }
+
+
+@pytest.mark.django_db
+def test_hot_filters_use_indexes(user, make_recipes):
+    recipes = make_recipes(3, author=user)
+    Favorite.objects.create(user=user, recipe=recipes[0])
+    lines = explain(user=user.pk)
+    assert len(lines) == 10
+    for name in (
+        'GET /api/recipes/?author=',
+        'GET /api/recipes/?is_favorited=1',
+        'GET /api/recipes/?is_in_shopping_cart=1',
+        'POST /api/recipes/{id}/favorite/',
+    ):
+        assert lines[name].endswith('ok'), lines[name]
+
+
+@pytest.mark.django_db
+def test_needs_a_user():
+    with pytest.raises(CommandError):
+        explain()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model, columns', [
+    (Favorite, ['user_id', 'recipe_id']),
+    (Cart, ['user_id', 'recipe_id']),
+    (Recipe, ['author_id', 'id']),
+])
+def test_composite_indexes_exist(model, columns):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+    assert any(
+        constraint['index'] and constraint['columns'] == columns
+        for constraint in constraints.values()
+    )
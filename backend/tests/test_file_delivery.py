@@ -0,0 +1,52 @@
+import pytest
+
+from recipes.models import Cart
+
+DOWNLOAD = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.fixture
+def cart(user, make_recipes):
+    recipe, = make_recipes(1)
+    return Cart.objects.create(user=user, recipe=recipe)
+
+
+def body(response):
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_django_streams_the_export_by_default(client, cart):
+    response = client.get(DOWNLOAD)
+    assert 'X-Accel-Redirect' not in response
+    assert cart.recipe.name in body(response)
+
+
+@pytest.mark.django_db
+def test_new_export_replaces_the_file_of_a_running_download(
+    client, cart, settings, tmp_path
+):
+    running = client.get(DOWNLOAD)
+    cart.servings = 3
+    cart.save()
+    assert 'порций: 3' in body(client.get(DOWNLOAD))
+    # The earlier download still reads the file it opened.
+    assert 'порций' not in body(running)
+    exports = tmp_path / 'protected' / 'shopping_lists'
+    assert [path.name for path in exports.iterdir()] == [
+        f'{cart.user_id}.txt'
+    ]
+
+
+@pytest.mark.django_db
+def test_x_accel_hands_the_export_to_nginx(client, cart, settings):
+    settings.FILE_DELIVERY = 'x-accel'
+    settings.X_ACCEL_LOCATIONS = {
+        settings.PROTECTED_MEDIA_ROOT: '/internal/protected/'
+    }
+    response = client.get(DOWNLOAD)
+    assert response['X-Accel-Redirect'] == (
+        f'/internal/protected/shopping_lists/{cart.user_id}.txt'
+    )
+    assert response.content == b''
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from foodgram import hashers
+
+
+@pytest.fixture
+def pool(settings, monkeypatch):
+    settings.PASSWORD_HASHING_POOL_SIZE = 1
+    monkeypatch.setattr(hashers, '_pool', None)
+    yield
+    hashers._pool.shutdown()
+
+
+def test_pool_workers_are_spawned(pool):
+    encoded = make_password('Very$ecret123')
+    assert check_password('Very$ecret123', encoded)
+    assert not check_password('wrong', encoded)
+    assert hashers._pool._mp_context.get_start_method() == 'spawn'
+
+
+def test_unknown_hasher_is_improperly_configured():
+    result = subprocess.run(
+        [sys.executable, '-c', 'from django.conf import settings; '
+         'settings.PASSWORD_HASHERS'],
+        cwd=settings.BASE_DIR,
+        env={
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'foodgram.settings',
+            'PASSWORD_HASHER': 'md5',
+        },
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert 'ImproperlyConfigured: PASSWORD_HASHER must be one of' in (
+        result.stderr
+    )
@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from PIL import Image
+
+from recipes import image_variants
+from recipes.image_variants import VariantError, get_variant
+
+
+@pytest.fixture
+def originals(settings):
+    directory = Path(settings.MEDIA_ROOT, 'recipes', 'images')
+    directory.mkdir(parents=True)
+    for number in range(3):
+        Image.new('RGB', (400, 400), (200, 80, 0)).save(
+            directory / f'{number}.png'
+        )
+    return [f'recipes/images/{number}.png' for number in range(3)]
+
+
+def variants(settings):
+    return sorted(Path(settings.IMAGE_VARIANTS_ROOT).rglob('*.webp'))
+
+
+def test_renders_scan_only_when_total_unknown(originals):
+    with mock.patch.object(
+        image_variants, 'evict', wraps=image_variants.evict
+    ) as evict:
+        for path in originals:
+            get_variant(path, 150, 150)
+    # The first render finds no running total, the others add to it.
+    evict.assert_called_once()
+
+
+def test_over_budget_evicts_least_recently_used(originals, settings):
+    first = get_variant(originals[0], 150, 150)
+    os.utime(first, (1, 1))
+    settings.IMAGE_VARIANTS_MAX_BYTES = first.stat().st_size * 5 // 2
+    second = get_variant(originals[1], 150, 150)
+    third = get_variant(originals[2], 150, 150)
+    assert variants(settings) == sorted([second, third])
+
+
+def test_failed_render_leaves_no_temporary_file(originals, settings):
+    def partial_save(image, path, *args, **kwargs):
+        Path(path).write_bytes(b'RIFF')
+        raise OSError('disk full')
+
+    with mock.patch.object(Image.Image, 'save', partial_save):
+        with pytest.raises(VariantError):
+            get_variant(originals[0], 150, 150)
+    directory = Path(settings.IMAGE_VARIANTS_ROOT)
+    assert not list(directory.rglob('*.tmp'))
+    assert not variants(settings)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+import pytest
+
+from recipes.ingredient_index import IngredientIndex
+from recipes.management.commands.benchmark_ingredient_index import (
+    SyntheticIndex,
+    synthetic_rows,
+)
+from recipes.models import AmountIngredient
+
+
+def recipe_ids(index, ingredient):
+    count, top = index.search([ingredient.pk])
+    return {recipe_id for recipe_id, _, _ in top(count)}
+
+
+def replace_ingredients(recipe, ingredients):
+    recipe.ingredient_amounts.all().delete()
+    for ingredient in ingredients:
+        AmountIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1
+        )
+
+
+@pytest.mark.django_db
+def test_processes_patch_each_others_changes_without_rebuild(
+    make_recipes, ingredients
+):
+    first, second = IngredientIndex(), IngredientIndex()
+    recipe, other = make_recipes(2)
+    assert recipe_ids(first, ingredients[9]) == set()
+    assert recipe_ids(second, ingredients[9]) == set()
+
+    # Both write before either searches again.
+    replace_ingredients(recipe, [ingredients[9]])
+    first.refresh_recipe(recipe.pk)
+    replace_ingredients(other, [ingredients[9], ingredients[0]])
+    second.refresh_recipe(other.pk)
+
+    for index in (first, second):
+        with mock.patch.object(index, 'build') as build:
+            assert recipe_ids(index, ingredients[9]) == {recipe.pk, other.pk}
+            assert recipe_ids(index, ingredients[1]) == set()
+        build.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_lost_change_log_rebuilds(make_recipes, ingredients):
+    first, second = IngredientIndex(), IngredientIndex()
+    recipe, = make_recipes(1)
+    recipe_ids(second, ingredients[9])
+    replace_ingredients(recipe, [ingredients[9]])
+    with mock.patch('recipes.ingredient_index.cache.add', return_value=True):
+        # The change entry is never stored.
+        first.refresh_recipe(recipe.pk)
+    assert recipe_ids(second, ingredients[9]) == {recipe.pk}
+
+
+def ranked(rows, ingredient_ids, n):
+    """Reference ranking: count every recipe, sort them all."""
+    ingredients = {}
+    for recipe_id, ingredient_id in rows:
+        ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+    wanted = set(ingredient_ids)
+    found = [
+        (recipe_id, len(ids & wanted), len(ids - wanted))
+        for recipe_id, ids in ingredients.items()
+        if ids & wanted
+    ]
+    found.sort(key=lambda item: (item[2], -item[1], item[0]))
+    return len(found), found[:n]
+
+
+QUERIES = [[0, 1, 2], [0, 150, 299], [200, 299], [0, 1, 2, 3, 4, 5, 6, 7]]
+
+
+@pytest.mark.parametrize('ingredient_ids', QUERIES)
+def test_ranking_at_scale_matches_full_sort(ingredient_ids):
+    rows = list(synthetic_rows(20000, 300))
+    index = SyntheticIndex()
+    index.load(rows)
+    count, top = index.search(ingredient_ids)
+    assert (count, top(50)) == ranked(rows, ingredient_ids, 50)
+
+
+def test_patches_equal_a_rebuild():
+    rows = list(synthetic_rows(5000, 100))
+    index = SyntheticIndex()
+    index.load(rows)
+    changes = {
+        # Dense and rare ingredients swapped, a recipe emptied, a new one.
+        10: {0, 1, 99}, 20: {98}, 30: set(), 5001: {0, 2, 50},
+    }
+    for recipe_id, ingredient_ids in changes.items():
+        index._patch_recipe(recipe_id, ingredient_ids)
+    rows = sorted(
+        [row for row in rows if row[0] not in changes]
+        + [
+            (recipe_id, ingredient_id)
+            for recipe_id, ingredient_ids in changes.items()
+            for ingredient_id in ingredient_ids
+        ]
+    )
+    for ingredient_ids in ([0, 1], [98, 99], [2, 50]):
+        count, top = index.search(ingredient_ids)
+        assert (count, top(100)) == ranked(rows, ingredient_ids, 100)
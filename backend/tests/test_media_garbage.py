@@ -0,0 +1,85 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe, User
+
+OLD = 2 * 60 * 60
+
+
+@pytest.fixture
+def media(settings, user, make_recipes):
+    """Media files by name, ``kept`` are referenced or too new."""
+    root = Path(settings.MEDIA_ROOT)
+
+    def create(name, age=OLD):
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'image')
+        os.utime(path, (path.stat().st_atime, path.stat().st_mtime - age))
+        return path
+
+    recipe, = make_recipes(1)
+    Recipe.objects.filter(pk=recipe.pk).update(image='recipes/images/kept.png')
+    User.objects.filter(pk=user.pk).update(avatar='recipes/avatars/kept.png')
+    return {
+        'kept': [
+            create('recipes/images/kept.png'),
+            create('recipes/avatars/kept.png'),
+            create('recipes/images/new.png', age=0),
+        ],
+        'orphans': [
+            create('recipes/images/orphan.png'),
+            create('recipes/images/2021/05/orphan.png'),
+            create('recipes/avatars/orphan.png'),
+        ],
+    }
+
+
+def collect(**options):
+    out = io.StringIO()
+    call_command(
+        'collect_media_garbage', max_per_second=0, stdout=out, **options
+    )
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_deletes_only_old_orphans(media):
+    assert 'Удалено файлов: 3' in collect()
+    assert all(path.exists() for path in media['kept'])
+    assert not any(path.exists() for path in media['orphans'])
+
+
+@pytest.mark.django_db
+def test_dry_run_lists_orphans(media):
+    output = collect(dry_run=True)
+    assert sorted(output.splitlines()[:-1]) == sorted(
+        str(path) for path in media['orphans']
+    )
+    assert all(path.exists() for path in media['kept'] + media['orphans'])
+
+
+@pytest.mark.django_db
+def test_quarantine_keeps_relative_paths(media, settings, tmp_path):
+    quarantine = tmp_path / 'quarantine'
+    collect(quarantine=str(quarantine))
+    assert all(path.exists() for path in media['kept'])
+    for path in media['orphans']:
+        assert not path.exists()
+        assert (
+            quarantine / path.relative_to(settings.MEDIA_ROOT)
+        ).read_bytes() == b'image'
+
+
+@pytest.mark.django_db
+def test_checks_paths_in_batches(media):
+    with CaptureQueriesContext(connection) as context:
+        collect(dry_run=True, batch_size=2)
+    # Three old images in two batches, two avatars in one.
+    assert len(context) == 3
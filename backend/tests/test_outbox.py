@@ -0,0 +1,44 @@
+import pytest
+from django.core import serializers
+
+from recipes import outbox
+from recipes.models import Favorite, OutboxEvent
+
+
+@pytest.mark.django_db
+def test_fixture_loads_publish_nothing(make_recipes):
+    recipe, = make_recipes(1)
+    favorite = Favorite.objects.create(user=recipe.author, recipe=recipe)
+    fixture = serializers.serialize('json', [favorite])
+    favorite.delete()
+    OutboxEvent.objects.all().delete()
+
+    for deserialized in serializers.deserialize('json', fixture):
+        deserialized.save()
+
+    assert Favorite.objects.exists()
+    assert not OutboxEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_group_counts_attempts_per_event(settings):
+    settings.OUTBOX_HANDLERS = {'test.failing': ['tests.test_outbox.fail']}
+    outbox.handlers_for.cache_clear()
+    OutboxEvent.objects.all().delete()
+    retried = OutboxEvent.objects.create(topic='test.failing', payload={},
+                                         attempts=3)
+    fresh = OutboxEvent.objects.create(topic='test.failing', payload={})
+    try:
+        assert outbox.process_batch(10) == 2
+    finally:
+        outbox.handlers_for.cache_clear()
+
+    retried.refresh_from_db()
+    fresh.refresh_from_db()
+    assert (retried.attempts, fresh.attempts) == (4, 1)
+    assert retried.available_at > fresh.available_at
+    assert retried.processed_at is None
+
+
+def fail(events):
+    raise RuntimeError('handler is down')
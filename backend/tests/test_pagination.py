@@ -0,0 +1,54 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.pagination import EstimatedCountPagination
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def postgresql():
+    # Filtered querysets never reach the pg_class lookup.
+    with mock.patch.object(connection, 'vendor', 'postgresql'):
+        yield
+
+
+def count(queryset):
+    with CaptureQueriesContext(connection) as context:
+        result = EstimatedCountPagination().get_count(queryset)
+    return result, len(context)
+
+
+@pytest.mark.django_db
+def test_listing_counts_exactly_outside_postgresql(client, make_recipes):
+    make_recipes(2)
+    assert client.get('/api/recipes/').json()['count'] == 2
+    make_recipes(1)
+    assert client.get('/api/recipes/').json()['count'] == 3
+
+
+@pytest.mark.django_db
+def test_filtered_counts_are_cached(postgresql, make_recipes):
+    recipes = make_recipes(2)
+    queryset = Recipe.objects.filter(author=recipes[0].author)
+    assert count(queryset) == (2, 1)
+    make_recipes(1, author=recipes[0].author)
+    assert count(queryset.all()) == (2, 0)
+    assert count(Recipe.objects.filter(cooking_time=1)) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_exact_setting_skips_the_cache(postgresql, settings, make_recipes):
+    settings.PAGINATION_COUNT = 'exact'
+    recipes = make_recipes(2)
+    queryset = Recipe.objects.filter(author=recipes[0].author)
+    assert count(queryset) == (2, 1)
+    make_recipes(1, author=recipes[0].author)
+    assert count(queryset) == (3, 1)
+
+
+@pytest.mark.django_db
+def test_empty_result_is_counted_without_a_query(postgresql):
+    assert count(Recipe.objects.filter(pk__in=[])) == (0, 0)
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework.test import APIRequestFactory
+
+from api.querysets import full_recipes, subscribed_authors
+from api.serializers import RecipeSerializer, UserWithAdditionalInfoSerializer
+from foodgram.db_connections import database_sync_to_async
+from foodgram.query_inspection import (
+    NPlusOneQueries,
+    QueryInspectionMiddleware,
+    inspect_queries,
+)
+from recipes.models import Recipe, Subscription, User
+from .conftest import make_user
+
+
+def get_request(user, **params):
+    request = APIRequestFactory().get('/', params)
+    request.user = user
+    return request
+
+
+@pytest.fixture
+def subscriptions(user, make_recipes):
+    for number in range(5):
+        author = make_user(f'author{number}')
+        make_recipes(3, author=author)
+        Subscription.objects.create(subscriber=user, author=author)
+
+
+@pytest.mark.django_db
+def test_recipe_serializer_has_no_n_plus_one(user, make_recipes):
+    make_recipes(5)
+    with inspect_queries('recipes', strict=True):
+        RecipeSerializer(
+            full_recipes(user), many=True,
+            context={'request': get_request(user)}
+        ).data
+
+
+@pytest.mark.django_db
+def test_strict_inspection_catches_n_plus_one(user, make_recipes):
+    make_recipes(5)
+    with pytest.raises(NPlusOneQueries, match='RecipeSerializer.author'):
+        with inspect_queries('recipes', strict=True):
+            RecipeSerializer(
+                Recipe.objects.all(), many=True,
+                context={'request': get_request(user)}
+            ).data
+
+
+@pytest.mark.django_db
+def test_subscriptions_have_no_n_plus_one(user, subscriptions):
+    request = get_request(user, recipes_limit='2')
+    with inspect_queries('subscriptions', strict=True):
+        data = UserWithAdditionalInfoSerializer(
+            subscribed_authors(user, request.GET), many=True,
+            context={'request': request}
+        ).data
+    assert len(data) == 5
+    for author in data:
+        assert author['recipes_count'] == 3
+        assert len(author['recipes']) == 2
+
+
+@pytest.mark.django_db
+def test_plain_subscriptions_queryset_is_n_plus_one(user, subscriptions):
+    request = get_request(user)
+    with pytest.raises(NPlusOneQueries):
+        with inspect_queries('subscriptions', strict=True):
+            UserWithAdditionalInfoSerializer(
+                User.objects.filter(authors__subscriber=user), many=True,
+                context={'request': request}
+            ).data
+
+
+@pytest.mark.django_db
+def test_subscriptions_endpoint(client, subscriptions):
+    with inspect_queries('subscriptions', strict=True):
+        data = client.get(
+            '/api/users/subscriptions/', {'recipes_limit': '1'}
+        ).json()
+    assert data['count'] == 5
+    assert [len(author['recipes']) for author in data['results']] == [1] * 5
+    assert {author['recipes_count'] for author in data['results']} == {3}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('to_async', [
+    database_sync_to_async,
+    # A fresh thread, its connection is opened after the middleware.
+    lambda func: sync_to_async(func, thread_sensitive=False),
+])
+def test_async_middleware_inspects_worker_thread_queries(settings, to_async):
+    settings.QUERY_INSPECTION_STRICT = True
+
+    async def get_response(request):
+        for _ in range(settings.N_PLUS_ONE_THRESHOLD):
+            await to_async(User.objects.filter(username='cook').exists)()
+        return HttpResponse()
+
+    middleware = QueryInspectionMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    with pytest.raises(NPlusOneQueries):
+        async_to_sync(middleware)(get_request(AnonymousUser()))
@@ -0,0 +1,70 @@
+import base64
+import io
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+
+def png():
+    image = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(image, 'PNG')
+    return (
+        'data:image/png;base64,' + base64.b64encode(image.getvalue()).decode()
+    )
+
+
+def count_queries(request):
+    with CaptureQueriesContext(connection) as context:
+        response = request()
+    assert response.status_code < 300, response.content
+    return len(context)
+
+
+@pytest.mark.django_db
+def test_list_queries_do_not_grow_with_recipes(client, make_recipes):
+    make_recipes(2)
+    few = count_queries(lambda: client.get('/api/recipes/'))
+    make_recipes(8)
+    make_recipes(5)
+    assert count_queries(lambda: client.get('/api/recipes/')) == few
+
+
+@pytest.mark.django_db
+def test_retrieve_queries_do_not_grow_with_ingredients(
+    client, make_recipes, ingredients
+):
+    small, = make_recipes(1)
+    large, = make_recipes(1)
+    large.ingredient_amounts.all().delete()
+    large.ingredient_amounts.bulk_create(
+        large.ingredient_amounts.model(
+            recipe=large, ingredient=ingredient, amount=1
+        )
+        for ingredient in ingredients
+    )
+    assert (
+        count_queries(lambda: client.get(f'/api/recipes/{large.pk}/'))
+        == count_queries(lambda: client.get(f'/api/recipes/{small.pk}/'))
+    )
+
+
+@pytest.mark.django_db
+def test_create_queries_do_not_grow_with_ingredients(client, ingredients):
+    def create(name, ingredients):
+        return lambda: client.post('/api/recipes/', {
+            'name': name,
+            'text': 'Текст',
+            'cooking_time': 5,
+            'image': png(),
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': 10}
+                for ingredient in ingredients
+            ],
+        }, format='json')
+
+    assert (
+        count_queries(create('Большой', ingredients))
+        == count_queries(create('Маленький', ingredients[:2]))
+    )
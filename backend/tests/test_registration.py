@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.bloom import BloomFilter, user_identifiers
+from recipes.models import User
+
+
+@pytest.fixture
+def identifiers(user, monkeypatch):
+    # Built from this test's users only.
+    monkeypatch.setattr(user_identifiers, '_filter', None)
+    user_identifiers.may_exist('')
+    return user_identifiers
+
+
+def register(username, email):
+    return APIClient().post('/api/users/', {
+        'username': username,
+        'email': email,
+        'first_name': 'Имя',
+        'last_name': 'Фамилия',
+        'password': 'Very$ecret123',
+    }, format='json')
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    values = [f'user{number}@example.com' for number in range(1000)]
+    for value in values:
+        bloom.add(value)
+    assert all(value in bloom for value in values)
+    false_positives = sum(
+        f'other{number}@example.com' in bloom for number in range(10_000)
+    )
+    assert false_positives < 300
+
+
+@pytest.mark.django_db
+def test_new_user_is_registered_without_uniqueness_queries(identifiers):
+    with CaptureQueriesContext(connection) as context:
+        response = register('newcomer', 'newcomer@example.com')
+    assert response.status_code == 201, response.content
+    assert not any(
+        query['sql'].startswith('SELECT') for query in context
+    )
+    assert identifiers.may_exist('NEWCOMER@example.com')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('username, email, fields', [
+    ('cook', 'other@example.com', {'username'}),
+    ('other', 'cook@example.com', {'email'}),
+    ('cook', 'cook@example.com', {'username', 'email'}),
+])
+def test_taken_values_are_field_errors(identifiers, username, email, fields):
+    with CaptureQueriesContext(connection) as context:
+        response = register(username, email)
+    assert response.status_code == 400
+    assert set(response.json()) == fields
+    assert len(context) == 1
+
+
+@pytest.mark.django_db
+def test_user_missing_from_the_filter_is_a_field_error(identifiers):
+    # bulk_create sends no post_save, as with another process's signup.
+    User.objects.bulk_create([
+        User(username='elsewhere', email='elsewhere@example.com')
+    ])
+    response = register('elsewhere', 'elsewhere@example.com')
+    assert response.status_code == 400
+    assert set(response.json()) == {'username', 'email'}
@@ -0,0 +1,68 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+from .test_recipe_queries import png
+
+DATA = {
+    'name': 'Ёжевика ',
+    'image': None,
+    1: [1.5, True],
+    'amount': decimal.Decimal('1.10'),
+    'uuid': uuid.UUID(int=5),
+    'pub_date': datetime.datetime(
+        2021, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+    ),
+}
+
+
+def test_renders_the_same_bytes_as_json_renderer():
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_renders_without_orjson(monkeypatch):
+    monkeypatch.setattr(renderers, 'orjson', None)
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_parses_rendered_data(monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(parsers, 'orjson', None)
+    data = {'name': 'Ёжевика', 'ingredients': [{'id': 1, 'amount': 10}]}
+    stream = io.BytesIO(FastJSONRenderer().render(data))
+    assert FastJSONParser().parse(stream) == data
+
+
+def test_malformed_json_is_a_parse_error():
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+
+@pytest.mark.django_db
+def test_api_round_trip(client, ingredients):
+    response = client.post(
+        '/api/recipes/',
+        {
+            'name': 'Ёжевика',
+            'text': 'Текст',
+            'cooking_time': 5,
+            'image': png(),
+            'ingredients': [{'id': ingredients[0].pk, 'amount': 10}],
+        },
+        format='json',
+    )
+    assert response.status_code == 201, response.content
+    assert response['Content-Type'] == 'application/json'
+    recipe = client.get(f"/api/recipes/{response.json()['id']}/").json()
+    assert recipe['name'] == 'Ёжевика'
+    assert recipe['ingredients'][0]['amount'] == 10
@@ -0,0 +1,48 @@
+import pytest
+
+from api.utils import generate_shopping_cart
+from recipes.models import AmountIngredient, Cart, Ingredient
+from recipes.shopping_list import (
+    aggregate_ingredients,
+    get_shopping_list,
+    normalize_name,
+)
+
+
+@pytest.fixture
+def cart(user, make_recipes):
+    first, second = make_recipes(2)
+    products = [
+        (first, 'Сахар', 'г', 200),
+        (second, 'сахар ', 'кг', 1),
+        (first, 'Ёжевика', 'г', 50),
+        (second, 'ежевика', 'г', 25),
+    ]
+    for recipe, name, unit, amount in products:
+        AmountIngredient.objects.create(
+            recipe=recipe,
+            ingredient=Ingredient.objects.create(
+                name=name, measurement_unit=unit
+            ),
+            amount=amount,
+        )
+    Cart.objects.create(user=user, recipe=first, servings=1)
+    Cart.objects.create(user=user, recipe=second, servings=2)
+
+
+@pytest.mark.django_db
+def test_products_are_merged_across_case_and_units(user, cart):
+    products = {
+        normalize_name(product['name']): product
+        for product in aggregate_ingredients(user)
+    }
+    assert products['сахар']['unit'] == 'г'
+    assert products['сахар']['total_amount'] == 200 + 1000 * 2
+    assert products['ежевика']['total_amount'] == 50 + 25 * 2
+
+
+@pytest.mark.django_db
+def test_downloaded_list_has_one_line_per_product(user, cart):
+    text = generate_shopping_cart(*get_shopping_list(user))
+    assert text.count('Сахар (г) — 2200') == 1
+    assert 'сахар' not in text.replace('Сахар', '')
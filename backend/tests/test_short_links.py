@@ -0,0 +1,51 @@
+import pytest
+
+from recipes import short_links
+
+
+@pytest.fixture(autouse=True)
+def resolver():
+    # Existence is cached per process, pks are reused between tests.
+    short_links.resolver.clear()
+    yield short_links.resolver
+    short_links.resolver.clear()
+
+
+def test_codes_round_trip_and_are_never_numeric():
+    for pk in [*range(200), 10 ** 9, short_links.MAX_PK]:
+        code = short_links.encode(pk)
+        assert not code.isdigit()
+        assert short_links.decode(code) == pk
+
+
+@pytest.mark.parametrize('code', ['zzzzzzzzzzz', '9' * 19, 'a-b', '0a'])
+def test_malformed_or_out_of_range_codes_are_rejected(code):
+    assert short_links.decode(code) is None
+
+
+@pytest.mark.django_db
+def test_short_link_redirects_to_recipe(client, make_recipes):
+    recipe, = make_recipes(1)
+    link = client.get(f'/api/recipes/{recipe.id}/get-link/').json()
+    response = client.get(link['short-link'])
+    assert response.status_code == 301
+    assert response['Location'] == f'/recipes/{recipe.id}/'
+    assert 'max-age' in response['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_numeric_links_keep_working(client, make_recipes):
+    recipe, = make_recipes(1)
+    response = client.get(f'/s/{recipe.id}/')
+    assert response['Location'] == f'/recipes/{recipe.id}/'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('path', [
+    '/s/zzzzzzzzzzz/',
+    '/s/99999999999999999999/',
+    '/api/recipes/99999999999999999999/get-link/',
+    '/api/recipes/99999999999999999999/similar/',
+])
+def test_out_of_range_links_are_not_found(client, path):
+    assert client.get(path).status_code == 404
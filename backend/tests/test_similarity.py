@@ -0,0 +1,22 @@
+import pytest
+
+from recipes import similarity
+from recipes.models import Cart, Favorite
+from .conftest import make_user
+
+
+@pytest.mark.django_db
+def test_incremental_scores_match_full_build(make_recipes):
+    recipes = make_recipes(6)
+    for number, user in enumerate(make_user(f'eater{n}') for n in range(4)):
+        for recipe in recipes[number:number + 3]:
+            Favorite.objects.create(user=user, recipe=recipe)
+        Cart.objects.create(user=user, recipe=recipes[-1 - number])
+    changed = {recipes[0].pk, recipes[3].pk}
+
+    pairs, users = similarity.cooccurrence()
+    full = dict(similarity.top_neighbors(
+        {recipe: pairs[recipe] for recipe in changed}, users, top_k=10
+    ))
+    pairs, users = similarity.cooccurrence(changed)
+    assert dict(similarity.top_neighbors(pairs, users, top_k=10)) == full
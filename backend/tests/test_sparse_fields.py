@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_fields_do_not_filter_the_nested_author(client, make_recipes):
+    recipe, = make_recipes(1)
+    data = client.get(
+        f'/api/recipes/{recipe.id}/', {'fields': 'name,author'}
+    ).json()
+    assert set(data) == {'name', 'author'}
+    assert data['author']['username'] == recipe.author.username
+
+
+@pytest.mark.django_db
+def test_omit_filters_list_items_but_not_the_author(client, make_recipes):
+    make_recipes(2)
+    results = client.get('/api/recipes/', {'omit': 'id'}).json()['results']
+    assert len(results) == 2
+    for data in results:
+        assert 'id' not in data
+        assert 'id' in data['author']